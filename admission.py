@@ -0,0 +1,223 @@
+# built-in
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+
+ENDPOINT_CLASSES: list[tuple[str, str]] = [
+    ("/search", "search"),
+    ("/repo-convert/convert", "convert"),
+    ("/repo-convert/explore", "explore"),
+    ("/repo-convert/tree", "explore"),
+    ("/repo-convert/fetch-file", "explore"),
+]
+
+JOB_SUBMISSION_PATH = "/repo-convert/jobs"
+
+
+def endpoint_class(method: str, path: str) -> str | None:
+    if method == "POST" and path == JOB_SUBMISSION_PATH:
+        return "convert"
+    for prefix, name in ENDPOINT_CLASSES:
+        if path == prefix or path.startswith(f"{prefix}/"):
+            return name
+    return None
+
+
+def client_key(user_id: str | None, host: str | None) -> str:
+    if user_id:
+        return f"user:{user_id}"
+    return f"ip:{host or 'unknown'}"
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code: int = status_code
+        self.reason: str = reason
+        self.retry_after: int = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate: float = rate
+        self.burst: float = burst
+        self.tokens: float = burst
+        self.updated: float = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float) -> float:
+        self._refill(time.monotonic())
+        if self.tokens >= cost:
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (cost - self.tokens) / self.rate
+
+    def take(self, cost: float) -> None:
+        self._refill(time.monotonic())
+        self.tokens -= cost
+
+
+@dataclass
+class ClassConfig:
+    concurrency: int
+    queue_size: int
+    max_wait: float
+    cost: float = 1.0
+    upstream: str | None = None
+
+
+class ConcurrencyPool:
+    def __init__(self, name: str, config: ClassConfig):
+        self.name: str = name
+        self.config: ClassConfig = config
+        self.active: int = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.service_time: float = 1.0
+
+        self.admitted: int = 0
+        self.queued: int = 0
+        self.rejected_full: int = 0
+        self.rejected_deadline: int = 0
+        self.shed_upstream: int = 0
+
+    def expected_wait(self) -> float:
+        backlog = len(self.waiters) + 1
+        return self.service_time * backlog / self.config.concurrency
+
+    def check_capacity(self) -> None:
+        if self.active < self.config.concurrency and not self.waiters:
+            return
+        if len(self.waiters) >= self.config.queue_size:
+            self.rejected_full += 1
+            raise Rejected(503, f"{self.name} queue is full", self.expected_wait())
+
+    async def acquire(self) -> None:
+        if self.active < self.config.concurrency and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        self.check_capacity()
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.config.max_wait)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                future.cancel()
+                self.waiters.remove(future)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected_deadline += 1
+                raise Rejected(
+                    503, f"{self.name} queue deadline exceeded", self.expected_wait()
+                )
+            raise
+        self.admitted += 1
+
+    def release(self, elapsed: float | None = None) -> None:
+        if elapsed is not None:
+            self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+        while self.waiters:
+            future = self.waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "active": self.active,
+            "waiting": len(self.waiters),
+            "concurrency": self.config.concurrency,
+            "queue_size": self.config.queue_size,
+            "service_time": round(self.service_time, 4),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_full": self.rejected_full,
+            "rejected_deadline": self.rejected_deadline,
+            "shed_upstream": self.shed_upstream,
+        }
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        classes: dict[str, ClassConfig],
+        user_rate: float,
+        user_burst: float,
+        global_rate: float,
+        global_burst: float,
+        max_users: int = 10000,
+        upstream_pressure=None,
+    ):
+        self.pools: dict[str, ConcurrencyPool] = {
+            name: ConcurrencyPool(name, config) for name, config in classes.items()
+        }
+        self.user_rate: float = user_rate
+        self.user_burst: float = user_burst
+        self.global_bucket: TokenBucket = TokenBucket(global_rate, global_burst)
+        self.user_buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self.max_users: int = max_users
+        self.upstream_pressure = upstream_pressure
+
+        self.rejected_user_rate: int = 0
+        self.rejected_global_rate: int = 0
+
+    def _user_bucket(self, key: str) -> TokenBucket:
+        bucket = self.user_buckets.get(key)
+        if bucket is None:
+            bucket = self.user_buckets[key] = TokenBucket(self.user_rate, self.user_burst)
+            while len(self.user_buckets) > self.max_users:
+                self.user_buckets.popitem(last=False)
+        else:
+            self.user_buckets.move_to_end(key)
+        return bucket
+
+    def _check_rate(self, user: str, cost: float) -> None:
+        bucket = self._user_bucket(user)
+        wait = bucket.wait_time(cost)
+        if wait > 0:
+            self.rejected_user_rate += 1
+            raise Rejected(429, "Too many requests", wait)
+        wait = self.global_bucket.wait_time(cost)
+        if wait > 0:
+            self.rejected_global_rate += 1
+            raise Rejected(429, "Server is busy", wait)
+        bucket.take(cost)
+        self.global_bucket.take(cost)
+
+    def _check_upstream(self, pool: ConcurrencyPool) -> None:
+        if self.upstream_pressure is None or pool.config.upstream is None:
+            return
+        retry_after = self.upstream_pressure(pool.config.upstream)
+        if retry_after > 0:
+            pool.shed_upstream += 1
+            raise Rejected(503, f"{pool.config.upstream} is overloaded", retry_after)
+
+    async def acquire(self, name: str, user: str) -> ConcurrencyPool:
+        pool = self.pools[name]
+        self._check_upstream(pool)
+        pool.check_capacity()
+        self._check_rate(user, pool.config.cost)
+        await pool.acquire()
+        return pool
+
+    def stats(self) -> dict:
+        return {
+            "tracked_users": len(self.user_buckets),
+            "global_tokens": round(self.global_bucket.tokens, 2),
+            "rejected_user_rate": self.rejected_user_rate,
+            "rejected_global_rate": self.rejected_global_rate,
+            "classes": {name: pool.stats() for name, pool in self.pools.items()},
+        }
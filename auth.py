@@ -1,16 +1,20 @@
 # built-in
+import asyncio
 import base64
 import hashlib
 import os
+import time
 
 # external
-from fastapi import Request, Response, HTTPException, Query
+import jwt
+from fastapi import Request, HTTPException, Query
 from fastapi.responses import RedirectResponse
 from urllib.parse import urlencode
 
 # internal
 from models import PKCEPair, UserInfo, AuthResponse
 import clients
+from metrics import track
 
 
 def generate_pkce_pair() -> PKCEPair:
@@ -66,9 +70,10 @@ async def handle_callback(request: Request, code: str = Query(...)) -> RedirectR
         if not code or not code_verifier:
             raise HTTPException(status_code=400, detail="Missing code or code_verifier")
 
-        session_response = await clients.supabase_client.auth.exchange_code_for_session(
-            {"auth_code": code, "code_verifier": code_verifier}
-        )
+        with track("supabase", "auth.exchange_code"):
+            session_response = await clients.supabase_client.auth.exchange_code_for_session(
+                {"auth_code": code, "code_verifier": code_verifier}
+            )
 
         session = session_response.session
         if not session:
@@ -107,8 +112,12 @@ async def handle_callback(request: Request, code: str = Query(...)) -> RedirectR
         )
 
 
-async def signout(response: Response) -> RedirectResponse:
+async def signout(request: Request) -> RedirectResponse:
     try:
+        access_token = request.cookies.get("access_token")
+        if access_token:
+            clients.session_cache.delete(_session_key(access_token))
+
         redirect_response: RedirectResponse = RedirectResponse(url="/")
         redirect_response.delete_cookie(key="access_token")
         redirect_response.delete_cookie(key="refresh_token")
@@ -117,18 +126,89 @@ async def signout(response: Response) -> RedirectResponse:
         raise HTTPException(status_code=500, detail=f"Signout failed: {str(e)}")
 
 
-async def get_user_info(request: Request) -> AuthResponse:
-    access_token = request.cookies.get("access_token")
-    if not access_token:
-        return AuthResponse(authenticated=False)
+def _session_key(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+
+async def verify_access_token(access_token: str) -> dict | None:
+    settings = clients.settings
+    options = {"require": ["exp", "sub"]}
+
+    if settings.supabase_jwt_secret:
+        return jwt.decode(
+            access_token,
+            settings.supabase_jwt_secret,
+            algorithms=["HS256"],
+            audience="authenticated",
+            options=options,
+        )
+
+    if clients.jwks_client:
+        with track("supabase", "auth.jwks"):
+            signing_key = await asyncio.to_thread(
+                clients.jwks_client.get_signing_key_from_jwt, access_token
+            )
+        return jwt.decode(
+            access_token,
+            signing_key.key,
+            algorithms=["RS256", "ES256"],
+            audience="authenticated",
+            options=options,
+        )
+
+    return None
+
+
+async def _resolve_user(access_token: str) -> tuple[AuthResponse, float]:
+    try:
+        claims = await verify_access_token(access_token)
+    except jwt.PyJWTError:
+        return AuthResponse(authenticated=False), 0
+
+    if claims is not None:
+        user_metadata: dict = claims.get("user_metadata") or {}
+        email: str = claims.get("email", "")
+        user_info: UserInfo = UserInfo(
+            id=claims["sub"],
+            email=email,
+            name=user_metadata.get("full_name", email),
+        )
+        return AuthResponse(authenticated=True, user=user_info), claims["exp"]
 
     try:
-        user = await clients.supabase_client.auth.get_user(access_token)
+        with track("supabase", "auth.get_user"):
+            user = await clients.supabase_client.auth.get_user(access_token)
         user_info: UserInfo = UserInfo(
             id=user.user.id,
             email=user.user.email,
             name=user.user.user_metadata.get("full_name", user.user.email),
         )
-        return AuthResponse(authenticated=True, user=user_info)
+        return AuthResponse(authenticated=True, user=user_info), 0
     except Exception:
-        return AuthResponse(authenticated=False)
+        return AuthResponse(authenticated=False), 0
+
+
+async def get_user_info(request: Request) -> AuthResponse:
+    cached_response: AuthResponse | None = getattr(request.state, "auth", None)
+    if cached_response is not None:
+        return cached_response
+
+    access_token = request.cookies.get("access_token")
+    if not access_token:
+        auth_response = AuthResponse(authenticated=False)
+        request.state.auth = auth_response
+        return auth_response
+
+    session_key: str = _session_key(access_token)
+    auth_response = clients.session_cache.get(session_key)
+    if auth_response is None:
+        auth_response, expires_at = await _resolve_user(access_token)
+        if auth_response.authenticated:
+            ttl: float = clients.settings.session_cache_ttl
+            if expires_at:
+                ttl = min(ttl, expires_at - time.time())
+            if ttl > 0:
+                clients.session_cache.set(session_key, auth_response, ttl=ttl)
+
+    request.state.auth = auth_response
+    return auth_response
@@ -0,0 +1,321 @@
+# built-in
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import time
+from array import array
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+# external
+import httpx
+
+# internal
+from blob_store import git_blob_sha
+from vector_store import LocalVectorIndex
+
+
+@dataclass
+class Latency:
+    median_ms: float = 0.0
+    sigma: float = 0.5
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        return rng.lognormvariate(0, self.sigma) * self.median_ms / 1000
+
+    @classmethod
+    def parse(cls, value: str) -> "Latency":
+        median, _, sigma = value.partition(":")
+        return cls(float(median), float(sigma) if sigma else 0.5)
+
+
+@dataclass
+class LatencyProfile:
+    github: Latency = field(default_factory=Latency)
+    openai: Latency = field(default_factory=Latency)
+    pinecone: Latency = field(default_factory=Latency)
+    supabase: Latency = field(default_factory=Latency)
+
+
+def fake_embedding(text: str, dimensions: int = 1536) -> list[float]:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    return [rng.gauss(0, 1) for _ in range(dimensions)]
+
+
+def _sample_source(index: int, lines: int) -> str:
+    body = "\n".join(f"    total += {i} * value" for i in range(lines))
+    return f"import math\n\n\ndef compute_{index}(value):\n    total = 0\n{body}\n    return math.sqrt(total)\n"
+
+
+class FakeRepository:
+    def __init__(self, owner: str = "bench", name: str = "sample", files: int = 200):
+        self.owner: str = owner
+        self.name: str = name
+        self.commit_sha: str = hashlib.sha1(f"{owner}/{name}".encode("utf-8")).hexdigest()
+        self.files: dict[str, bytes] = {}
+        for index in range(files):
+            directory = f"pkg{index % 10}"
+            self.files[f"{directory}/module_{index}.py"] = _sample_source(
+                index, 20 + index % 50
+            ).encode("utf-8")
+        self.blobs: dict[str, bytes] = {
+            git_blob_sha(content): content for content in self.files.values()
+        }
+
+    @property
+    def url(self) -> str:
+        return f"https://github.com/{self.owner}/{self.name}"
+
+    def tree(self) -> dict:
+        directories = sorted({path.rsplit("/", 1)[0] for path in self.files})
+        entries = [
+            {"path": directory, "type": "tree", "sha": hashlib.sha1(directory.encode()).hexdigest()}
+            for directory in directories
+        ]
+        entries += [
+            {"path": path, "type": "blob", "sha": git_blob_sha(content), "size": len(content)}
+            for path, content in self.files.items()
+        ]
+        return {"sha": self.commit_sha, "tree": entries, "truncated": False}
+
+
+class FakeUpstreams:
+    def __init__(
+        self,
+        latency: LatencyProfile | None = None,
+        repository: FakeRepository | None = None,
+        seed: int = 0,
+        dimensions: int = 1536,
+    ):
+        self.latency: LatencyProfile = latency or LatencyProfile()
+        self.repository: FakeRepository = repository or FakeRepository()
+        self.rng: random.Random = random.Random(seed)
+        self.dimensions: int = dimensions
+        self.calls: dict[str, int] = {}
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host == "api.github.com":
+            await asyncio.sleep(self.latency.github.sample(self.rng))
+            return self._github(request)
+        if host == "api.openai.com":
+            await asyncio.sleep(self.latency.openai.sample(self.rng))
+            return self._openai(request)
+        return httpx.Response(404, json={"message": f"Unknown host {host}"})
+
+    def _count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _github(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        repo = self.repository
+        prefix = f"/repos/{repo.owner}/{repo.name}"
+        headers = {
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "4999",
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        }
+
+        if path == "/search/repositories":
+            self._count("github.search")
+            per_page = int(request.url.params.get("per_page", 10))
+            query = request.url.params.get("q", "")
+            items = [
+                {
+                    "id": int(hashlib.md5(f"{query}:{index}".encode("utf-8")).hexdigest()[:8], 16),
+                    "full_name": f"bench/{query.split()[0] if query else 'repo'}-{index}",
+                    "html_url": f"https://github.com/bench/repo-{index}",
+                    "description": f"Benchmark repository {index} about {query}",
+                    "language": "Python",
+                    "stargazers_count": 1000 - index,
+                }
+                for index in range(per_page)
+            ]
+            return httpx.Response(200, json={"items": items}, headers=headers)
+
+        if path == prefix:
+            self._count("github.repo")
+            return httpx.Response(200, json={"default_branch": "main"}, headers=headers)
+
+        if path.startswith(f"{prefix}/commits/"):
+            self._count("github.commit")
+            return httpx.Response(200, text=repo.commit_sha, headers=headers)
+
+        if path.startswith(f"{prefix}/git/trees/"):
+            self._count("github.tree")
+            return httpx.Response(200, json=repo.tree(), headers=headers)
+
+        if path.startswith(f"{prefix}/git/blobs/"):
+            self._count("github.blob")
+            content = repo.blobs.get(path.rsplit("/", 1)[1])
+            if content is None:
+                return httpx.Response(404, json={"message": "Not Found"})
+            return httpx.Response(200, content=content, headers=headers)
+
+        return httpx.Response(404, json={"message": "Not Found"})
+
+    def _openai(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content or b"{}")
+        path = request.url.path
+
+        if path.endswith("/embeddings"):
+            self._count("openai.embeddings")
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            dimensions = body.get("dimensions") or self.dimensions
+            return httpx.Response(
+                200,
+                json={
+                    "object": "list",
+                    "model": body.get("model"),
+                    "data": [
+                        {
+                            "object": "embedding",
+                            "index": index,
+                            "embedding": self._encode_embedding(
+                                fake_embedding(text, dimensions),
+                                body.get("encoding_format"),
+                            ),
+                        }
+                        for index, text in enumerate(inputs)
+                    ],
+                    "usage": {"prompt_tokens": 0, "total_tokens": 0},
+                },
+            )
+
+        if path.endswith("/chat/completions"):
+            self._count("openai.chat")
+            return httpx.Response(200, json=self._chat(body))
+
+        return httpx.Response(404, json={"error": {"message": "Not Found"}})
+
+    @staticmethod
+    def _encode_embedding(vector: list[float], encoding_format: str | None):
+        if encoding_format == "base64":
+            return base64.b64encode(array("f", vector).tobytes()).decode("ascii")
+        return vector
+
+    def _chat(self, body: dict) -> dict:
+        user_message: str = body["messages"][-1]["content"]
+        message: dict = {"role": "assistant", "content": None}
+
+        if body.get("tools"):
+            words = re.findall(r"[a-z]+", user_message.lower())
+            arguments = {"keywords": words[:3] or ["code"], "languages": []}
+            message["tool_calls"] = [
+                {
+                    "id": "call_bench",
+                    "type": "function",
+                    "function": {
+                        "name": "extract_params",
+                        "arguments": json.dumps(arguments),
+                    },
+                }
+            ]
+        else:
+            code = user_message.split("```")[-2] if "```" in user_message else ""
+            message["content"] = f"```\n{code.strip()}\n```"
+
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+
+class FakePineconeIndex(LocalVectorIndex):
+    def __init__(self, latency: Latency, rng: random.Random):
+        super().__init__(path=None)
+        self.latency: Latency = latency
+        self.rng: random.Random = rng
+
+    async def upsert(self, vectors: list[dict], namespace: str = "") -> dict:
+        await asyncio.sleep(self.latency.sample(self.rng))
+        return await super().upsert(vectors, namespace)
+
+    async def query(self, *args, **kwargs):
+        await asyncio.sleep(self.latency.sample(self.rng))
+        return await super().query(*args, **kwargs)
+
+    async def update(self, *args, **kwargs) -> dict:
+        await asyncio.sleep(self.latency.sample(self.rng))
+        return await super().update(*args, **kwargs)
+
+
+class _FakeQuery:
+    def __init__(self, client: "FakeSupabaseClient", table: str):
+        self.client = client
+        self.table = table
+        self.filters: list[tuple[str, str]] = []
+        self.operation: str = "select"
+        self.payload: dict | None = None
+
+    def select(self, *columns: str) -> "_FakeQuery":
+        self.operation = "select"
+        return self
+
+    def insert(self, payload: dict) -> "_FakeQuery":
+        self.operation = "insert"
+        self.payload = payload
+        return self
+
+    def delete(self) -> "_FakeQuery":
+        self.operation = "delete"
+        return self
+
+    def eq(self, column: str, value: str) -> "_FakeQuery":
+        self.filters.append((column, value))
+        return self
+
+    def _matches(self, row: dict) -> bool:
+        return all(row.get(column) == value for column, value in self.filters)
+
+    async def execute(self) -> SimpleNamespace:
+        await asyncio.sleep(self.client.latency.sample(self.client.rng))
+        rows = self.client.tables.setdefault(self.table, [])
+        if self.operation == "insert":
+            rows.append(dict(self.payload))
+            return SimpleNamespace(data=[self.payload])
+        if self.operation == "delete":
+            removed = [row for row in rows if self._matches(row)]
+            self.client.tables[self.table] = [row for row in rows if not self._matches(row)]
+            return SimpleNamespace(data=removed)
+        return SimpleNamespace(data=[row for row in rows if self._matches(row)])
+
+
+class _FakeAuth:
+    def __init__(self, client: "FakeSupabaseClient"):
+        self.client = client
+        self._url = "https://bench.supabase.co/auth/v1"
+
+    async def get_user(self, access_token: str) -> SimpleNamespace:
+        await asyncio.sleep(self.client.latency.sample(self.client.rng))
+        return SimpleNamespace(
+            user=SimpleNamespace(
+                id=f"user-{access_token[:8]}",
+                email="bench@example.com",
+                user_metadata={"full_name": "Bench User"},
+            )
+        )
+
+
+class FakeSupabaseClient:
+    def __init__(self, latency: Latency, rng: random.Random):
+        self.latency: Latency = latency
+        self.rng: random.Random = rng
+        self.tables: dict[str, list[dict]] = {}
+        self.auth = _FakeAuth(self)
+
+    def table(self, name: str) -> _FakeQuery:
+        return _FakeQuery(self, name)
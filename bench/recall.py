@@ -0,0 +1,247 @@
+# built-in
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from itertools import product
+
+# external
+import numpy as np
+
+# internal
+from bench.fakes import FakePineconeIndex, FakeSupabaseClient, FakeUpstreams, Latency
+from bench.run import configure_environment, percentile
+
+
+QUERIES: list[str] = [
+    "fast json parser",
+    "async http client",
+    "web framework for building rest apis",
+    "orm for postgres",
+    "command line argument parsing",
+    "machine learning model serving",
+    "image resizing library",
+    "markdown to html converter",
+    "static site generator",
+    "websocket server",
+    "rate limiter middleware",
+    "distributed task queue",
+    "key value store embedded database",
+    "terminal user interface toolkit",
+    "pdf generation",
+    "jwt authentication",
+    "graphql server implementation",
+    "unit testing framework with fixtures",
+    "logging library with structured output",
+    "configuration file loader yaml toml",
+    "static type checker",
+    "code formatter",
+    "http router with middleware",
+    "vector similarity search",
+    "game engine 2d",
+    "natural language processing toolkit",
+    "time series database",
+    "s3 compatible object storage client",
+    "dependency injection container",
+    "package manager for native extensions",
+]
+
+TOPICS: list[str] = [
+    "json parser",
+    "http client",
+    "web framework",
+    "database orm",
+    "cli argument parser",
+    "model serving",
+    "image processing",
+    "markdown renderer",
+    "static site generator",
+    "websocket server",
+    "rate limiter",
+    "task queue",
+    "key value store",
+    "terminal ui",
+    "pdf toolkit",
+    "authentication",
+    "graphql server",
+    "testing framework",
+    "structured logging",
+    "configuration loader",
+    "type checker",
+    "code formatter",
+    "http router",
+    "vector search",
+    "game engine",
+    "nlp toolkit",
+    "time series database",
+    "object storage client",
+    "dependency injection",
+    "package manager",
+]
+
+QUALIFIERS: list[str] = [
+    "A fast",
+    "A minimal",
+    "A production-ready",
+    "An experimental",
+    "A lightweight",
+    "A batteries-included",
+]
+
+LANGUAGES: list[str] = ["Python", "Go", "Rust", "JavaScript", "Java", "C++"]
+
+
+def synthetic_corpus() -> list[str]:
+    return [
+        f"{qualifier} {topic} written in {language}"
+        for topic, qualifier, language in product(TOPICS, QUALIFIERS, LANGUAGES)
+    ]
+
+
+def load_corpus(path: str | None, size: int) -> list[str]:
+    if not path:
+        return synthetic_corpus()[:size]
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        texts = [metadata.get("description") or "" for metadata in data.values()]
+    else:
+        texts = [str(text) for text in data]
+    return [text for text in dict.fromkeys(texts) if text][:size]
+
+
+async def embed_all(texts: list[str], dimensions: int | None) -> np.ndarray:
+    import clients
+    from search import EMBEDDING_MODEL
+
+    vectors = await asyncio.gather(
+        *(clients.embedding_batcher.embed(text, EMBEDDING_MODEL, dimensions) for text in texts)
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> list[set[int]]:
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = queries @ corpus.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+async def evaluate(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    truth: list[set[int]],
+    quantization: str,
+    k: int,
+    repeats: int,
+) -> dict:
+    from vector_store import LocalVectorIndex
+
+    index = LocalVectorIndex(path=None, quantization=quantization)
+    await index.upsert(
+        [{"id": str(i), "values": vector} for i, vector in enumerate(corpus)]
+    )
+
+    recalls: list[float] = []
+    timings: list[float] = []
+    for query, expected in zip(queries, truth):
+        for _ in range(repeats):
+            started = time.perf_counter()
+            response = await index.query(vector=query, top_k=k)
+            timings.append((time.perf_counter() - started) * 1000)
+        found = {int(match.id) for match in response.matches}
+        recalls.append(len(found & expected) / len(expected))
+
+    stats = await index.describe_index_stats()
+    return {
+        "recall": statistics.fmean(recalls),
+        "p50_ms": percentile(timings, 0.50),
+        "p95_ms": percentile(timings, 0.95),
+        "vector_bytes": stats["vector_bytes"],
+        "bytes_per_vector": stats["vector_bytes"] / len(corpus),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import clients
+
+    if args.fake:
+        upstreams = FakeUpstreams(seed=args.seed)
+        await clients.setup_clients(
+            transport=upstreams.transport(),
+            vector_index=FakePineconeIndex(Latency(), upstreams.rng),
+            supabase=FakeSupabaseClient(Latency(), upstreams.rng),
+        )
+    else:
+        await clients.setup_clients()
+
+    corpus_texts = load_corpus(args.corpus, args.corpus_size)
+    results: list[dict] = []
+    try:
+        baseline_corpus = await embed_all(corpus_texts, None)
+        baseline_queries = await embed_all(QUERIES, None)
+        truth = exact_top_k(baseline_corpus, baseline_queries, args.k)
+
+        for dimensions in args.dimensions:
+            full = dimensions >= baseline_corpus.shape[1]
+            corpus = baseline_corpus if full else await embed_all(corpus_texts, dimensions)
+            queries = baseline_queries if full else await embed_all(QUERIES, dimensions)
+            for quantization in args.quantization:
+                result = await evaluate(
+                    corpus, queries, truth, quantization, args.k, args.repeats
+                )
+                result.update(dimensions=corpus.shape[1], quantization=quantization)
+                results.append(result)
+    finally:
+        await clients.close_clients()
+
+    return {"k": args.k, "corpus_size": len(corpus_texts), "results": results}
+
+
+def print_report(report: dict) -> None:
+    print(f"corpus={report['corpus_size']} queries={len(QUERIES)} k={report['k']}")
+    header = f"{'dimensions':>10}{'quantization':>14}{'recall':>9}{'p50 ms':>9}{'p95 ms':>9}{'bytes/vec':>11}"
+    print(header)
+    print("-" * len(header))
+    for result in report["results"]:
+        print(
+            f"{result['dimensions']:>10}{result['quantization']:>14}{result['recall']:>9.3f}"
+            f"{result['p50_ms']:>9.3f}{result['p95_ms']:>9.3f}{result['bytes_per_vector']:>11.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure recall@k and query latency for reduced and quantized embeddings."
+    )
+    parser.add_argument("--dimensions", type=int, action="append")
+    parser.add_argument("--quantization", action="append")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--corpus", help="JSON list of texts or a lexical index file")
+    parser.add_argument("--corpus-size", type=int, default=5000)
+    parser.add_argument("--fake", action="store_true", help="use deterministic fake embeddings")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+    args.dimensions = args.dimensions or [1536, 1024, 512, 256]
+    args.quantization = args.quantization or ["none", "float16", "int8"]
+
+    if args.fake:
+        with tempfile.TemporaryDirectory() as directory:
+            configure_environment(directory)
+            report = asyncio.run(run(args))
+    else:
+        report = asyncio.run(run(args))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# built-in
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+# internal
+from bench.fakes import (
+    FakePineconeIndex,
+    FakeSupabaseClient,
+    FakeUpstreams,
+    Latency,
+    LatencyProfile,
+)
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[int], Awaitable[object]]
+    reset: Callable[[], None] | None = None
+
+
+def configure_environment(directory: str) -> None:
+    defaults = {
+        "GITHUB_TOKEN": "bench",
+        "OPENAI_API_KEY": "bench",
+        "SUPABASE_URL": "https://bench.supabase.co",
+        "SUPABASE_KEY": "bench",
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+    os.environ["VECTOR_BACKEND"] = "local"
+    os.environ["LOCAL_INDEX_PATH"] = os.path.join(directory, "vector_index")
+    os.environ["EMBEDDING_CACHE_PATH"] = ""
+    os.environ["BLOB_STORE_PATH"] = ""
+    os.environ["CONVERSION_CACHE_PATH"] = os.path.join(directory, "conversions.sqlite3")
+    os.environ["JOB_DB_PATH"] = os.path.join(directory, "jobs.sqlite3")
+    os.environ["LEXICAL_INDEX_PATH"] = ""
+    os.environ["INDEX_LEDGER_PATH"] = ""
+
+
+def build_stages(upstreams: FakeUpstreams) -> list[Stage]:
+    import clients
+    from auth import get_user_info
+    from blob_store import BlobStore
+    from converter import convert_code, get_file_content, get_repo_tree
+    from models import Repository, SearchParams
+    from search import extract_keywords, parallel_upsert, search_github, search_pinecone
+    from starlette.requests import Request
+
+    repository = upstreams.repository
+    paths = sorted(repository.files)
+
+    def repositories(iteration: int) -> list[Repository]:
+        return [
+            Repository(
+                id=f"{iteration}-{index}",
+                full_name=f"bench/repo-{iteration}-{index}",
+                html_url=f"https://github.com/bench/repo-{iteration}-{index}",
+                description=f"Benchmark repository {index} for iteration {iteration}",
+                language="Python",
+                stargazers_count=index,
+            )
+            for index in range(10)
+        ]
+
+    def request(iteration: int) -> Request:
+        return Request(
+            {
+                "type": "http",
+                "method": "GET",
+                "path": "/",
+                "headers": [(b"cookie", f"access_token=token-{iteration}".encode())],
+            }
+        )
+
+    def reset_github() -> None:
+        clients.github.cache.clear()
+
+    def reset_tree() -> None:
+        clients.github.cache.clear()
+        clients.ref_cache.clear()
+        clients.tree_cache.clear()
+
+    def reset_blobs() -> None:
+        clients.blob_store = BlobStore(path=None)
+
+    return [
+        Stage(
+            "extract_keywords[local]",
+            lambda i: extract_keywords(f"python json parser {i}"),
+        ),
+        Stage(
+            "extract_keywords[llm]",
+            lambda i: extract_keywords(f"how do I parse json without a library {i}"),
+        ),
+        Stage(
+            "search_github",
+            lambda i: search_github(SearchParams(keywords=["json", "parser"], languages=["python"])),
+            reset_github,
+        ),
+        Stage("parallel_upsert", lambda i: parallel_upsert(repositories(i))),
+        Stage("search_pinecone", lambda i: search_pinecone(f"json parser {i}", top_k=5)),
+        Stage("get_repo_tree", lambda i: get_repo_tree(repository.url), reset_tree),
+        Stage(
+            "get_file_content",
+            lambda i: get_file_content(repository.url, paths[i % len(paths)]),
+            reset_blobs,
+        ),
+        Stage(
+            "convert_code",
+            lambda i: convert_code(
+                repository.files[paths[i % len(paths)]].decode("utf-8") + f"# {i}\n",
+                "python",
+                "javascript",
+            ),
+        ),
+        Stage("get_user_info", lambda i: get_user_info(request(i)), clients.session_cache.clear),
+    ]
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def measure(stage: Stage, iterations: int, warmup: int, offset: int) -> dict:
+    for i in range(warmup):
+        if stage.reset:
+            stage.reset()
+        await stage.run(offset + i)
+
+    timings: list[float] = []
+    for i in range(iterations):
+        if stage.reset:
+            stage.reset()
+        started = time.perf_counter()
+        await stage.run(offset + warmup + i)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    allocations: list[int] = []
+    tracemalloc.start()
+    try:
+        for i in range(min(iterations, 20)):
+            if stage.reset:
+                stage.reset()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await stage.run(offset + warmup + iterations + i)
+            _, peak = tracemalloc.get_traced_memory()
+            allocations.append(peak - before)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": percentile(timings, 0.50),
+        "p95_ms": percentile(timings, 0.95),
+        "p99_ms": percentile(timings, 0.99),
+        "max_ms": max(timings),
+        "peak_alloc_kib": statistics.fmean(allocations) / 1024,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import clients
+    import search as search_service
+
+    latency = LatencyProfile(
+        github=args.latency.get("github", Latency()),
+        openai=args.latency.get("openai", Latency()),
+        pinecone=args.latency.get("pinecone", Latency()),
+        supabase=args.latency.get("supabase", Latency()),
+    )
+    upstreams = FakeUpstreams(latency=latency, seed=args.seed)
+    await clients.setup_clients(
+        transport=upstreams.transport(),
+        vector_index=FakePineconeIndex(latency.pinecone, upstreams.rng),
+        supabase=FakeSupabaseClient(latency.supabase, upstreams.rng),
+    )
+    search_service.start_index_writer()
+
+    results: dict[str, dict] = {}
+    try:
+        for offset, stage in enumerate(build_stages(upstreams)):
+            if args.stage and stage.name not in args.stage:
+                continue
+            results[stage.name] = await measure(
+                stage, args.iterations, args.warmup, offset * 100000
+            )
+    finally:
+        await search_service.stop_index_writer()
+        await clients.close_clients()
+
+    return {"results": results, "upstream_calls": upstreams.calls}
+
+
+def print_report(report: dict) -> None:
+    header = f"{'stage':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'peak KiB':>11}"
+    print(header)
+    print("-" * len(header))
+    for name, result in report["results"].items():
+        print(
+            f"{name:<26}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            f"{result['p99_ms']:>10.2f}{result['mean_ms']:>10.2f}{result['peak_alloc_kib']:>11.1f}"
+        )
+    print()
+    print("upstream calls:", json.dumps(report["upstream_calls"], sort_keys=True))
+
+
+def compare(report: dict, baseline_path: str, max_regression: float) -> list[str]:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline: dict = json.load(f)
+
+    regressions: list[str] = []
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or previous["p50_ms"] <= 0:
+            continue
+        ratio = result["p50_ms"] / previous["p50_ms"]
+        if ratio > max_regression:
+            regressions.append(
+                f"{name}: p50 {previous['p50_ms']:.2f}ms -> {result['p50_ms']:.2f}ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def parse_latency(values: list[str]) -> dict[str, Latency]:
+    latency: dict[str, Latency] = {}
+    for value in values:
+        upstream, _, spec = value.partition("=")
+        latency[upstream] = Latency.parse(spec)
+    return latency
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark each service stage against in-process fake upstreams."
+    )
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        metavar="UPSTREAM=MEDIAN_MS[:SIGMA]",
+        help="lognormal latency for github, openai, pinecone or supabase",
+    )
+    parser.add_argument("--stage", action="append", help="only run the named stage")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="compare p50 latencies against this report")
+    parser.add_argument("--max-regression", type=float, default=1.25)
+    args = parser.parse_args()
+    args.latency = parse_latency(args.latency)
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure_environment(directory)
+        report = asyncio.run(run(args))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(report, args.baseline, args.max_regression)
+        if regressions:
+            print("\nregressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
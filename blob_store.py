@@ -0,0 +1,86 @@
+# built-in
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+
+def git_blob_sha(content: bytes) -> str:
+    header = f"blob {len(content)}\0".encode("utf-8")
+    return hashlib.sha1(header + content).hexdigest()
+
+
+class BlobStore:
+    def __init__(self, path: str | None = None, max_memory_bytes: int = 64 * 1024 * 1024):
+        self.path: str | None = path
+        self.max_memory_bytes: int = max_memory_bytes
+        self.memory: OrderedDict[str, bytes] = OrderedDict()
+        self.memory_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def _file_path(self, sha: str) -> str:
+        return os.path.join(self.path, sha[:2], sha[2:])
+
+    def _remember(self, sha: str, content: bytes) -> None:
+        if len(content) > self.max_memory_bytes:
+            return
+        if sha in self.memory:
+            self.memory.move_to_end(sha)
+            return
+
+        self.memory[sha] = content
+        self.memory_bytes += len(content)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def get(self, sha: str) -> bytes | None:
+        content = self.memory.get(sha)
+        if content is not None:
+            self.memory.move_to_end(sha)
+            self.hits += 1
+            return content
+
+        if self.path:
+            try:
+                with open(self._file_path(sha), "rb") as f:
+                    content = f.read()
+            except FileNotFoundError:
+                content = None
+            if content is not None:
+                self._remember(sha, content)
+                self.hits += 1
+                return content
+
+        self.misses += 1
+        return None
+
+    def put(self, sha: str, content: bytes) -> None:
+        if git_blob_sha(content) != sha:
+            raise ValueError(f"Content does not match blob SHA {sha}")
+
+        self._remember(sha, content)
+        if not self.path:
+            return
+
+        file_path = self._file_path(sha)
+        if os.path.exists(file_path):
+            return
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(file_path), delete=False
+        ) as f:
+            f.write(content)
+        os.replace(f.name, file_path)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
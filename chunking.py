@@ -0,0 +1,271 @@
+# built-in
+import ast
+import re
+
+
+BRACE_LANGUAGES: set[str] = {
+    "javascript",
+    "java",
+    "c",
+    "c++",
+    "c#",
+    "go",
+    "rust",
+    "php",
+    "swift",
+}
+
+HEADER_PATTERN = re.compile(
+    r"^\s*(import\b|from\b|#include\b|using\b|use\b|package\b|require\b|require_relative\b|namespace\b.*;|<\?php)"
+)
+
+
+def _python_units(source_code: str) -> tuple[list[str], list[str], list[str]] | None:
+    try:
+        module = ast.parse(source_code)
+    except SyntaxError:
+        return None
+
+    lines = source_code.splitlines(keepends=True)
+    header: list[str] = []
+    signatures: list[str] = []
+    units: list[str] = []
+    position = 0
+
+    for node in module.body:
+        end = node.end_lineno
+        text = "".join(lines[position:end])
+        position = end
+
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            header.append(text)
+            continue
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            signatures.append(lines[node.lineno - 1].strip())
+        units.append(text)
+
+    if position < len(lines):
+        units.append("".join(lines[position:]))
+    return header, signatures, units
+
+
+def _strip_literals(line: str) -> str:
+    line = re.sub(r'"(?:\\.|[^"\\])*"', '""', line)
+    line = re.sub(r"'(?:\\.|[^'\\])*'", "''", line)
+    return line.split("//", 1)[0]
+
+
+def _sanitize(line: str, in_comment: bool) -> tuple[str | None, bool]:
+    code = line
+    if in_comment:
+        if "*/" not in code:
+            return None, True
+        code = code.split("*/", 1)[1]
+    code = re.sub(r"/\*.*?\*/", "", _strip_literals(code))
+    if "/*" in code:
+        return code.split("/*", 1)[0], True
+    return code, False
+
+
+def _brace_units(source_code: str) -> tuple[list[str], list[str], list[str]]:
+    header: list[str] = []
+    signatures: list[str] = []
+    units: list[str] = []
+    current: list[str] = []
+    depth = 0
+    in_comment = False
+
+    for line in source_code.splitlines(keepends=True):
+        code, in_comment = _sanitize(line, in_comment)
+        if code is None:
+            current.append(line)
+            continue
+
+        if depth == 0 and not current and HEADER_PATTERN.match(line):
+            header.append(line)
+            continue
+
+        if depth == 0 and code.strip() and not current:
+            signatures.append(line.strip())
+        current.append(line)
+        depth += code.count("{") - code.count("}")
+        depth = max(depth, 0)
+
+        if depth == 0 and (code.rstrip().endswith(("}", "};", ";")) or not code.strip()):
+            units.append("".join(current))
+            current = []
+
+    if current:
+        units.append("".join(current))
+    return header, signatures, units
+
+
+def _indent_units(source_code: str) -> tuple[list[str], list[str], list[str]]:
+    header: list[str] = []
+    signatures: list[str] = []
+    units: list[str] = []
+    current: list[str] = []
+
+    for line in source_code.splitlines(keepends=True):
+        top_level = line.strip() and not line[0].isspace()
+        if top_level and HEADER_PATTERN.match(line) and not current:
+            header.append(line)
+            continue
+        if top_level and current and line.strip() != "end":
+            units.append("".join(current))
+            current = []
+        if top_level and not current:
+            signatures.append(line.strip())
+        current.append(line)
+
+    if current:
+        units.append("".join(current))
+    return header, signatures, units
+
+
+def _python_members(unit: str) -> tuple[str, list[str], list[str], str] | None:
+    try:
+        module = ast.parse(unit)
+    except SyntaxError:
+        return None
+    classes = [node for node in module.body if isinstance(node, ast.ClassDef)]
+    if len(classes) != 1 or len(classes[0].body) < 2:
+        return None
+
+    lines = unit.splitlines(keepends=True)
+    first = classes[0].body[0]
+    position = min(
+        [first.lineno] + [decorator.lineno for decorator in getattr(first, "decorator_list", [])]
+    ) - 1
+    opening = "".join(lines[:position])
+    signatures: list[str] = []
+    members: list[str] = []
+
+    for node in classes[0].body:
+        end = node.end_lineno
+        members.append("".join(lines[position:end]))
+        position = end
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            signatures.append(lines[node.lineno - 1].strip())
+
+    return opening, signatures, members, "".join(lines[position:])
+
+
+def _brace_members(unit: str) -> tuple[str, list[str], list[str], str] | None:
+    opening: list[str] = []
+    signatures: list[str] = []
+    members: list[str] = []
+    current: list[str] = []
+    closing: list[str] = []
+    depth = 0
+    opened = False
+    signed = False
+    in_comment = False
+
+    for line in unit.splitlines(keepends=True):
+        code, in_comment = _sanitize(line, in_comment)
+        if not opened:
+            opening.append(line)
+            if code is not None:
+                depth += code.count("{") - code.count("}")
+            if depth > 1:
+                return None
+            opened = depth == 1
+            continue
+        if depth == 0:
+            closing.append(line)
+            continue
+        if code is None:
+            current.append(line)
+            continue
+
+        next_depth = depth + code.count("{") - code.count("}")
+        if next_depth <= 0:
+            closing.append(line)
+            depth = 0
+            continue
+
+        if depth == 1 and code.strip() and not signed:
+            signatures.append(line.strip())
+            signed = True
+        current.append(line)
+        depth = next_depth
+        if depth == 1 and code.rstrip().endswith(("}", "};", ";")):
+            members.append("".join(current))
+            current = []
+            signed = False
+
+    if current:
+        members.append("".join(current))
+    if not opened or len(members) < 2:
+        return None
+    return "".join(opening), signatures, members, "".join(closing)
+
+
+def _split_oversized(unit: str, max_chars: int) -> list[str]:
+    if len(unit) <= max_chars:
+        return [unit]
+
+    pieces: list[str] = []
+    current: list[str] = []
+    size = 0
+    for line in unit.splitlines(keepends=True):
+        if current and size + len(line) > max_chars:
+            pieces.append("".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line)
+    if current:
+        pieces.append("".join(current))
+    return pieces
+
+
+def split_source(
+    source_code: str, language: str, max_chunk_chars: int = 12000
+) -> tuple[str, list[str]]:
+    units_result = None
+    if language == "python":
+        units_result = _python_units(source_code)
+    if units_result is None:
+        if language in BRACE_LANGUAGES:
+            units_result = _brace_units(source_code)
+        else:
+            units_result = _indent_units(source_code)
+    header, signatures, units = units_result
+
+    pieces: list[str] = []
+    for unit in units:
+        if len(unit) <= max_chunk_chars:
+            pieces.append(unit)
+            continue
+        members = (
+            _python_members(unit) if language == "python" else _brace_members(unit)
+        )
+        if members is None:
+            pieces += _split_oversized(unit, max_chunk_chars)
+            continue
+        opening, member_signatures, member_units, closing = members
+        signatures += member_signatures
+        member_units[0] = opening + member_units[0]
+        member_units[-1] += closing
+        for member in member_units:
+            pieces += _split_oversized(member, max_chunk_chars)
+
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for piece in pieces:
+        if current and size + len(piece) > max_chunk_chars:
+            chunks.append("".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece)
+    if current:
+        chunks.append("".join(current))
+
+    context = "".join(header)
+    if signatures:
+        context += "\n" + "\n".join(signatures)
+    if chunks:
+        chunks[0] = "".join(header) + chunks[0]
+    return context.strip(), chunks
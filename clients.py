@@ -1,39 +1,232 @@
 # external
 import httpx
+from jwt import PyJWKClient
 from openai import AsyncOpenAI
 from pinecone import PineconeAsyncio
-from supabase import acreate_client
+from supabase import AsyncClientOptions, acreate_client
 
 # internal
 from models import Setting
+from cache import TTLCache
+from singleflight import SingleFlight
+from github_client import GITHUB_API_URL, GitHubClient
+from http_pools import HTTPPools, PoolConfig
+from blob_store import BlobStore
+from conversion_cache import ConversionCache
+from embedding_cache import EmbeddingCache
+from embedding_batcher import EmbeddingBatcher
+from vector_store import LocalVectorIndex
+from lexical_index import BM25Index
+from freshness import IndexLedger
+from admission import AdmissionController, ClassConfig
 
 
 openai_client = None
 pinecone_index = None
-http_client = None
+http_pools = None
 github_token = None
 supabase_client = None
+embedding_cache = None
+embedding_batcher = None
+keyword_cache = None
+settings = None
+github = None
+jwks_client = None
+session_cache = None
+favorites_cache = None
+ref_cache = None
+tree_cache = None
+blob_store = None
+conversion_cache = None
+search_flight = None
+tree_flight = None
+blob_flight = None
+lexical_index = None
+index_ledger = None
+admission = None
+page_cache = None
 
 
-async def setup_clients():
-    global supabase_client, openai_client, pinecone_index, http_client, github_token
+async def setup_clients(
+    transport: httpx.AsyncBaseTransport | None = None,
+    vector_index=None,
+    supabase=None,
+):
+    global supabase_client, openai_client, pinecone_index, http_pools, github_token
+    global embedding_cache, embedding_batcher, keyword_cache, settings
+    global github, jwks_client, session_cache, favorites_cache
+    global ref_cache, tree_cache, blob_store, conversion_cache
+    global search_flight, tree_flight, blob_flight, lexical_index, index_ledger
+    global admission, page_cache
 
     settings = Setting()
 
-    supabase_client = await acreate_client(settings.supabase_url, settings.supabase_key)
+    supabase_client = supabase or await acreate_client(
+        settings.supabase_url,
+        settings.supabase_key,
+        options=AsyncClientOptions(postgrest_client_timeout=settings.supabase_timeout),
+    )
+    if settings.supabase_jwks_url:
+        jwks_client = PyJWKClient(settings.supabase_jwks_url, cache_keys=True)
+    session_cache = TTLCache(ttl=settings.session_cache_ttl, max_entries=10000)
+    favorites_cache = TTLCache(ttl=settings.favorites_cache_ttl, max_entries=10000)
 
-    http_client = httpx.AsyncClient()
+    http_pools = HTTPPools(
+        {
+            "github": PoolConfig(
+                max_connections=settings.github_pool_size,
+                max_keepalive=settings.github_pool_size,
+                keepalive_expiry=settings.http_keepalive_expiry,
+                connect_timeout=settings.http_connect_timeout,
+                read_timeout=settings.github_timeout,
+                pool_timeout=settings.http_pool_timeout,
+                http2=settings.http2,
+                warmup_url=f"{GITHUB_API_URL}/rate_limit",
+                warmup_connections=settings.http_warmup_connections,
+            ),
+            "openai": PoolConfig(
+                max_connections=settings.openai_pool_size,
+                max_keepalive=settings.openai_pool_size,
+                keepalive_expiry=settings.http_keepalive_expiry,
+                connect_timeout=settings.http_connect_timeout,
+                read_timeout=settings.openai_timeout,
+                pool_timeout=settings.http_pool_timeout,
+                http2=settings.http2,
+                warmup_url="https://api.openai.com/v1/models",
+                warmup_connections=settings.http_warmup_connections,
+            ),
+        },
+        transport=transport,
+    )
     openai_client = AsyncOpenAI(
-        api_key=settings.openai_api_key, http_client=http_client
+        api_key=settings.openai_api_key,
+        http_client=http_pools.client("openai"),
+        timeout=http_pools.configs["openai"].timeout(),
     )
 
-    pc_async = PineconeAsyncio(api_key=settings.pinecone_api_key)
-    pinecone_index = pc_async.IndexAsyncio(host=settings.pinecone_host)
+    embedding_batcher = EmbeddingBatcher(
+        openai_client,
+        max_batch_size=settings.embedding_batch_size,
+        window_ms=settings.embedding_batch_window_ms,
+    )
+
+    if vector_index is not None:
+        pinecone_index = vector_index
+    elif settings.vector_backend == "local":
+        pinecone_index = LocalVectorIndex(
+            path=settings.local_index_path,
+            quantization=settings.vector_quantization,
+        )
+    elif settings.vector_backend == "pinecone":
+        pc_async = PineconeAsyncio(api_key=settings.pinecone_api_key)
+        pinecone_index = pc_async.IndexAsyncio(
+            host=settings.pinecone_host,
+            connection_pool_maxsize=settings.pinecone_pool_size,
+        )
+    else:
+        raise ValueError(f"Unknown vector backend: {settings.vector_backend}")
+
+    lexical_index = BM25Index(path=settings.lexical_index_path or None)
+    index_ledger = IndexLedger(
+        path=settings.index_ledger_path or None,
+        max_age=settings.index_max_age,
+        star_change_ratio=settings.index_star_change_ratio,
+        star_refresh_age=settings.index_star_refresh_age,
+    )
 
     github_token = settings.github_token
+    github = GitHubClient(
+        http_pools.client("github"),
+        github_token,
+        cache_size=settings.github_cache_size,
+        cache_bytes=settings.github_cache_bytes,
+        reserve=settings.github_rate_limit_reserve,
+        max_wait=settings.github_max_wait,
+    )
+    ref_cache = TTLCache(ttl=settings.ref_cache_ttl, max_entries=10000)
+    tree_cache = TTLCache(ttl=86400, max_entries=settings.tree_cache_size)
+    blob_store = BlobStore(
+        path=settings.blob_store_path or None,
+        max_memory_bytes=settings.blob_memory_bytes,
+    )
+    conversion_cache = ConversionCache(
+        settings.conversion_cache_path, max_bytes=settings.conversion_cache_bytes
+    )
+
+    embedding_cache = EmbeddingCache(
+        max_entries=settings.embedding_cache_size,
+        path=settings.embedding_cache_path or None,
+    )
+    keyword_cache = TTLCache(ttl=settings.keyword_cache_ttl, max_entries=10000)
+
+    search_flight = SingleFlight(ttl=settings.search_result_ttl)
+    tree_flight = SingleFlight()
+    blob_flight = SingleFlight()
+    page_cache = TTLCache(
+        ttl=settings.search_page_cache_ttl, max_entries=settings.search_page_cache_size
+    )
+
+    admission = None
+    if settings.admission_enabled:
+        admission = AdmissionController(
+            {
+                "search": ClassConfig(
+                    concurrency=settings.search_concurrency,
+                    queue_size=settings.admission_queue_size,
+                    max_wait=settings.admission_max_wait,
+                    upstream="github_search",
+                ),
+                "convert": ClassConfig(
+                    concurrency=settings.convert_concurrency,
+                    queue_size=settings.admission_queue_size,
+                    max_wait=settings.admission_max_wait,
+                    cost=settings.admission_convert_cost,
+                    upstream="openai",
+                ),
+                "explore": ClassConfig(
+                    concurrency=settings.explore_concurrency,
+                    queue_size=settings.admission_queue_size,
+                    max_wait=settings.admission_max_wait,
+                    upstream="github",
+                ),
+            },
+            user_rate=settings.admission_user_rate,
+            user_burst=settings.admission_user_burst,
+            global_rate=settings.admission_global_rate,
+            global_burst=settings.admission_global_burst,
+            upstream_pressure=upstream_pressure,
+        )
+
+
+def upstream_pressure(upstream: str) -> float:
+    if upstream == "github_search":
+        return github.blocked_for("search")
+    if upstream == "github":
+        return github.blocked_for("core")
+
+    transport = http_pools.transports.get(upstream)
+    if transport is not None and transport.active >= transport.max_connections:
+        return settings.admission_max_wait
+    return 0.0
+
+
+async def warm_up_clients():
+    await http_pools.warm_up()
 
 
 async def close_clients():
-    global http_client
-    if http_client:
-        await http_client.aclose()
+    if embedding_batcher:
+        await embedding_batcher.close()
+    if isinstance(pinecone_index, LocalVectorIndex):
+        await pinecone_index.close()
+    if lexical_index:
+        lexical_index.persist()
+    if index_ledger:
+        index_ledger.flush()
+        index_ledger.close()
+    if embedding_cache:
+        embedding_cache.close()
+    if conversion_cache:
+        conversion_cache.close()
+    if http_pools:
+        await http_pools.close()
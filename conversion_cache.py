@@ -0,0 +1,167 @@
+# built-in
+import hashlib
+import os
+import sqlite3
+import time
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable
+
+# internal
+from blob_store import git_blob_sha
+from singleflight import SingleFlight, StreamFlight
+
+
+TOUCH_BATCH_SIZE = 64
+
+
+def conversion_key(
+    source_code: str,
+    source_language: str,
+    target_language: str,
+    model: str,
+    prompt_version: str,
+) -> str:
+    content_sha = git_blob_sha(source_code.encode("utf-8"))
+    raw = "\0".join(
+        (content_sha, source_language.lower(), target_language.lower(), model, prompt_version)
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ConversionCache:
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS conversions "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS conversions_last_used ON conversions (last_used)"
+        )
+        self.db.commit()
+
+        self.max_bytes: int = max_bytes
+        self.total_bytes: int = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM conversions"
+        ).fetchone()[0]
+        self.flights: SingleFlight = SingleFlight()
+        self.streams: StreamFlight = StreamFlight()
+        self.touched: dict[str, float] = {}
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: str) -> str | None:
+        row = self.db.execute(
+            "SELECT value FROM conversions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.touched[key] = time.time()
+        if len(self.touched) >= TOUCH_BATCH_SIZE:
+            with self.db:
+                self._write_touches()
+        self.hits += 1
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        previous = self.db.execute(
+            "SELECT size FROM conversions WHERE key = ?", (key,)
+        ).fetchone()
+        if previous is not None:
+            self.total_bytes -= previous[0]
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO conversions (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, value, size, time.time()),
+        )
+        self.total_bytes += size
+        self.touched.pop(key, None)
+        self._write_touches()
+        self._evict()
+        self.db.commit()
+
+    def _write_touches(self) -> None:
+        if not self.touched:
+            return
+        self.db.executemany(
+            "UPDATE conversions SET last_used = ? WHERE key = ?",
+            [(last_used, key) for key, last_used in self.touched.items()],
+        )
+        self.touched.clear()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes:
+            rows = self.db.execute(
+                "SELECT key, size FROM conversions ORDER BY last_used LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self.total_bytes = 0
+                return
+            for key, size in rows:
+                self.db.execute("DELETE FROM conversions WHERE key = ?", (key,))
+                self.total_bytes -= size
+                if self.total_bytes <= self.max_bytes:
+                    return
+
+    async def _create(self, key: str, factory: Callable[[], Awaitable[str]]) -> str:
+        value = await factory()
+        self.set(key, value)
+        return value
+
+    async def _as_stream(
+        self, key: str, factory: Callable[[], Awaitable[str]]
+    ) -> AsyncIterator[str]:
+        yield await self._create(key, factory)
+
+    async def _collect(
+        self, key: str, factory: Callable[[], AsyncIterator[str]]
+    ) -> str:
+        chunks = [text async for text in self.streams.stream(key, factory)]
+        cached = self.get(key)
+        return cached if cached is not None else "".join(chunks).strip()
+
+    async def get_or_create(
+        self, key: str, factory: Callable[[], Awaitable[str]]
+    ) -> str:
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        if key in self.streams.in_flight:
+            return await self._collect(key, partial(self._as_stream, key, factory))
+        return await self.flights.do(key, partial(self._create, key, factory))
+
+    async def stream(
+        self, key: str, factory: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        cached = self.get(key)
+        if cached is not None:
+            yield cached
+            return
+        if key in self.flights.in_flight:
+            yield await self.flights.do(key, partial(self._collect, key, factory))
+            return
+        async for text in self.streams.stream(key, factory):
+            yield text
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.flights.coalesced + self.streams.coalesced,
+            "in_flight": len(self.flights.in_flight) + len(self.streams.in_flight),
+        }
+
+    def close(self) -> None:
+        with self.db:
+            self._write_touches()
+        self.db.close()
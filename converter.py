@@ -1,13 +1,51 @@
 # built-in
+import asyncio
+import json
 import os
+from contextvars import ContextVar
+from functools import partial
+from typing import AsyncIterator
 
 # external
 from fastapi import Request, HTTPException
+from fastapi.responses import StreamingResponse
 
 # internal
 import clients
 from auth import get_user_info
 from models import AuthResponse
+from repo_tree import RepoTree, load_tree
+from conversion_cache import conversion_key
+from chunking import split_source
+from metrics import track
+
+
+FILE_SIZE_LIMIT = 1000000
+
+CONVERSION_MODEL = "gpt-4o"
+CONVERSION_PROMPT_VERSION = "1"
+
+conversion_usage: ContextVar[list[int] | None] = ContextVar(
+    "conversion_usage", default=None
+)
+
+EXTENSION_LANGUAGES: dict[str, str] = {
+    ".py": "python",
+    ".js": "javascript",
+    ".java": "java",
+    ".c": "c",
+    ".cpp": "c++",
+    ".cs": "c#",
+    ".go": "go",
+    ".rb": "ruby",
+    ".php": "php",
+    ".swift": "swift",
+    ".rs": "rust",
+}
+
+LANGUAGE_EXTENSIONS: dict[str, str] = {
+    language: extension for extension, language in EXTENSION_LANGUAGES.items()
+}
 
 
 async def handle_code_conversion(request: Request) -> dict:
@@ -41,11 +79,77 @@ async def handle_code_conversion(request: Request) -> dict:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def convert_code(
-    source_code: str, source_language: str, target_language: str
-) -> str:
-    try:
-        prompt = f"""
+class FenceStripper:
+    def __init__(self, preamble_limit: int = 512):
+        self.preamble_limit: int = preamble_limit
+        self.state: str = "preamble"
+        self.buffer: str = ""
+
+    def feed(self, text: str) -> str:
+        self.buffer += text
+        output: list[str] = []
+
+        while True:
+            if self.state == "preamble":
+                index = self.buffer.find("```")
+                if index == -1:
+                    if len(self.buffer) <= self.preamble_limit:
+                        break
+                    self.state = "raw"
+                    continue
+                self.buffer = self.buffer[index + 3 :]
+                self.state = "header"
+            elif self.state == "header":
+                newline = self.buffer.find("\n")
+                if newline == -1:
+                    break
+                header = self.buffer[:newline].strip()
+                if header and (" " in header or header.startswith(("#", "//"))):
+                    self.state = "code"
+                    continue
+                self.buffer = self.buffer[newline + 1 :]
+                self.state = "code"
+            elif self.state == "code":
+                index = self.buffer.find("```")
+                if index != -1:
+                    output.append(self.buffer[:index])
+                    self.buffer = ""
+                    self.state = "done"
+                    break
+                held = len(self.buffer) - len(self.buffer.rstrip("`"))
+                output.append(self.buffer[: len(self.buffer) - held])
+                self.buffer = self.buffer[len(self.buffer) - held :]
+                break
+            elif self.state == "raw":
+                output.append(self.buffer)
+                self.buffer = ""
+                break
+            else:
+                self.buffer = ""
+                break
+
+        return "".join(output)
+
+    def finish(self) -> str:
+        remainder, self.buffer = self.buffer, ""
+        if self.state in ("preamble", "raw", "code"):
+            return remainder
+        return ""
+
+
+def strip_code_fences(text: str) -> str:
+    stripper = FenceStripper(preamble_limit=len(text))
+    return (stripper.feed(text) + stripper.finish()).strip()
+
+
+def conversion_messages(
+    source_code: str,
+    source_language: str,
+    target_language: str,
+    context: str | None = None,
+    part: tuple[int, int] | None = None,
+) -> list[dict]:
+    prompt = f"""
         Convert the following {source_language} code to {target_language}.
         Maintain the same functionality and logic.
         Add necessary comments to explain the code.
@@ -56,116 +160,263 @@ async def convert_code(
         ```
         """
 
+    if part is not None:
+        index, total = part
+        imports_rule = (
+            "Include the converted imports at the top."
+            if index == 0
+            else "Do not repeat imports or declarations that belong to other parts."
+        )
+        prompt = f"""
+        This is part {index + 1} of {total} of a larger {source_language} file that is being converted to {target_language} piece by piece.
+        For reference, these are the file's imports and top-level signatures:
+        ```
+        {context}
+        ```
+        Convert only the code in this part. {imports_rule}
+        """ + prompt
+
+    return [
+        {
+            "role": "system",
+            "content": "You are a code conversion assistant. Convert code from one language to another while maintaining the same functionality.",
+        },
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _conversion_key(
+    source_code: str,
+    source_language: str,
+    target_language: str,
+    prompt_version: str = CONVERSION_PROMPT_VERSION,
+) -> str:
+    return conversion_key(
+        source_code,
+        source_language,
+        target_language,
+        CONVERSION_MODEL,
+        prompt_version,
+    )
+
+
+async def _request_conversion(
+    source_code: str,
+    source_language: str,
+    target_language: str,
+    context: str | None = None,
+    part: tuple[int, int] | None = None,
+) -> str:
+    with track("openai", "chat.convert"):
         response = await clients.openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a code conversion assistant. Convert code from one language to another while maintaining the same functionality.",
-                },
-                {"role": "user", "content": prompt},
-            ],
+            model=CONVERSION_MODEL,
+            messages=conversion_messages(
+                source_code, source_language, target_language, context, part
+            ),
             temperature=0.2,
         )
 
-        converted_code = response.choices[0].message.content
+    usage = conversion_usage.get()
+    if usage is not None and response.usage is not None:
+        usage.append(response.usage.total_tokens)
 
-        if "```" in converted_code:
-            code_blocks = converted_code.split("```")
-            if len(code_blocks) >= 3:
-                code_content = code_blocks[1].strip()
-                if "\n" in code_content:
-                    lines = code_content.split("\n")
-                    if not lines[0].strip().startswith("#") and not lines[
-                        0
-                    ].strip().startswith("//"):
-                        code_content = "\n".join(lines[1:])
-                return code_content
+    choice = response.choices[0]
+    if choice.finish_reason != "stop":
+        raise RuntimeError(f"Conversion stopped early: {choice.finish_reason}")
+    return strip_code_fences(choice.message.content or "")
 
-        return converted_code
 
-    except Exception as e:
-        print(f"Error converting code: {e}")
-        raise RuntimeError(f"Failed to convert code: {str(e)}")
+def _chunk_tasks(
+    source_code: str, source_language: str, target_language: str
+) -> list[asyncio.Task]:
+    settings = clients.settings
+    context, chunks = split_source(
+        source_code, source_language, settings.chunk_max_chars
+    )
+    semaphore = asyncio.Semaphore(settings.chunk_concurrency)
+
+    async def convert_chunk(index: int, chunk: str) -> str:
+        part = (index, len(chunks))
+        async with semaphore:
+            return await clients.conversion_cache.get_or_create(
+                _conversion_key(
+                    f"{context}\0{chunk}",
+                    source_language,
+                    target_language,
+                    f"{CONVERSION_PROMPT_VERSION}-chunk-{int(index == 0)}",
+                ),
+                lambda: _request_conversion(
+                    chunk, source_language, target_language, context, part
+                ),
+            )
 
+    return [
+        asyncio.create_task(convert_chunk(index, chunk))
+        for index, chunk in enumerate(chunks)
+    ]
 
-async def get_repo_tree(repo_url: str) -> list[dict]:
 
-    try:
-        parts = repo_url.rstrip("/").split("/")
-        if len(parts) < 5 or parts[2] != "github.com":
-            raise ValueError("Invalid GitHub repository URL")
+def _needs_chunking(source_code: str) -> bool:
+    return len(source_code) > clients.settings.chunk_threshold_chars
 
-        owner = parts[3]
-        repo = parts[4]
 
-        token: str = clients.github_token
-        headers: dict[str, str] = {
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": f"token {token}",
-        }
+async def _convert_chunked(
+    source_code: str, source_language: str, target_language: str
+) -> str:
+    tasks = _chunk_tasks(source_code, source_language, target_language)
+    try:
+        converted: list[str] = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return "\n\n".join(part for part in converted if part)
 
-        base_url = f"https://api.github.com/repos/{owner}/{repo}"
-        response = await clients.http_client.get(base_url, headers=headers)
-        response.raise_for_status()
-        repo_data = response.json()
-        default_branch = repo_data.get("default_branch", "main")
 
-        tree_url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{default_branch}?recursive=1"
-        response = await clients.http_client.get(tree_url, headers=headers)
-        response.raise_for_status()
+async def _convert_checked(
+    source_code: str, source_language: str, target_language: str
+) -> str:
+    convert = _convert_chunked if _needs_chunking(source_code) else _request_conversion
+    converted: str = await convert(source_code, source_language, target_language)
+    if not converted:
+        raise RuntimeError("Conversion returned no code")
+    return converted
 
-        tree_data = response.json()
 
-        files = [
-            item for item in tree_data.get("tree", []) if item.get("type") == "blob"
-        ]
+async def convert_code(
+    source_code: str, source_language: str, target_language: str
+) -> str:
+    try:
+        return await clients.conversion_cache.get_or_create(
+            _conversion_key(source_code, source_language, target_language),
+            partial(_convert_checked, source_code, source_language, target_language),
+        )
 
-        return files
     except Exception as e:
-        print(f"Error fetching repository tree: {e}")
-        raise RuntimeError(f"Failed to fetch repository tree: {str(e)}")
-
+        print(f"Error converting code: {e}")
+        raise RuntimeError(f"Failed to convert code: {str(e)}")
 
-async def get_file_content(repo_url: str, file_path: str) -> dict:
 
+async def _stream_chunked(
+    key: str, source_code: str, source_language: str, target_language: str
+) -> AsyncIterator[str]:
+    tasks = _chunk_tasks(source_code, source_language, target_language)
+    converted: list[str] = []
+    try:
+        for task in tasks:
+            text = await task
+            if not text:
+                continue
+            if converted:
+                yield "\n\n"
+            converted.append(text)
+            yield text
+        if not converted:
+            raise RuntimeError("Conversion returned no code")
+        clients.conversion_cache.set(key, "\n\n".join(converted))
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _stream_single(
+    key: str, source_code: str, source_language: str, target_language: str
+) -> AsyncIterator[str]:
+    with track("openai", "chat.convert_stream"):
+        stream = await clients.openai_client.chat.completions.create(
+            model=CONVERSION_MODEL,
+            messages=conversion_messages(source_code, source_language, target_language),
+            temperature=0.2,
+            stream=True,
+        )
+    stripper = FenceStripper()
+    converted: list[str] = []
+    finish_reason: str | None = None
     try:
-        parts = repo_url.rstrip("/").split("/")
-        if len(parts) < 5 or parts[2] != "github.com":
-            raise ValueError("Invalid GitHub repository URL")
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            delta = choice.delta.content
+            if not delta:
+                continue
+            text = stripper.feed(delta)
+            if text:
+                converted.append(text)
+                yield text
+        remainder = stripper.finish()
+        if remainder:
+            converted.append(remainder)
+            yield remainder
+
+        result: str = "".join(converted).strip()
+        if finish_reason != "stop":
+            raise RuntimeError(
+                f"Conversion stopped early: {finish_reason or 'no finish reason'}"
+            )
+        if not result:
+            raise RuntimeError("Conversion returned no code")
+        clients.conversion_cache.set(key, result)
+    finally:
+        await stream.close()
 
-        owner = parts[3]
-        repo = parts[4]
 
-        token: str = clients.github_token
-        headers: dict[str, str] = {
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": f"token {token}",
-        }
+async def stream_convert_code(
+    source_code: str, source_language: str, target_language: str
+) -> AsyncIterator[str]:
+    key: str = _conversion_key(source_code, source_language, target_language)
+    stream = _stream_chunked if _needs_chunking(source_code) else _stream_single
+    async for text in clients.conversion_cache.stream(
+        key, partial(stream, key, source_code, source_language, target_language)
+    ):
+        yield text
 
-        content_url = (
-            f"https://api.github.com/repos/{owner}/{repo}/contents/{file_path}"
-        )
-        response = await clients.http_client.get(content_url, headers=headers)
-        response.raise_for_status()
 
-        content_data = response.json()
+async def get_repo_tree(repo_url: str) -> list[dict]:
 
-        if content_data.get("size", 0) > 1000000:
-            raise ValueError("File too large to convert")
+    try:
+        tree: RepoTree = await load_tree(repo_url)
+        return await tree.walk()
+    except Exception as e:
+        print(f"Error fetching repository tree: {e}")
+        raise RuntimeError(f"Failed to fetch repository tree: {str(e)}")
 
-        content = content_data.get("content", "")
 
-        import base64
+async def _download_blob(tree: RepoTree, sha: str) -> bytes:
+    content: bytes = await clients.github.download(
+        f"/repos/{tree.owner}/{tree.repo}/git/blobs/{sha}",
+        max_bytes=FILE_SIZE_LIMIT,
+    )
+    clients.blob_store.put(sha, content)
+    return content
 
-        decoded_content = base64.b64decode(content.replace("\n", "")).decode("utf-8")
+
+async def get_file_content(
+    repo_url: str, file_path: str, sha: str | None = None
+) -> dict:
+
+    try:
+        tree: RepoTree = await load_tree(repo_url, sha)
+        entry: dict = await tree.find(file_path)
+        if entry["type"] != "blob":
+            raise ValueError(f"Not a file: {file_path}")
+        if (entry.get("size") or 0) > FILE_SIZE_LIMIT:
+            raise ValueError("File too large to convert")
+
+        content: bytes | None = clients.blob_store.get(entry["sha"])
+        if content is None:
+            content = await clients.blob_flight.do(
+                entry["sha"], partial(_download_blob, tree, entry["sha"])
+            )
 
         _, file_extension = os.path.splitext(file_path)
         language = detect_language(file_extension)
 
         return {
-            "path": file_path,
-            "content": decoded_content,
+            "path": entry["path"],
+            "sha": entry["sha"],
+            "content": content.decode("utf-8"),
             "language": language,
             "repo_url": repo_url,
         }
@@ -175,21 +426,7 @@ async def get_file_content(repo_url: str, file_path: str) -> dict:
 
 
 def detect_language(file_extension: str) -> str:
-    extension_map = {
-        ".py": "python",
-        ".js": "javascript",
-        ".java": "java",
-        ".c": "c",
-        ".cpp": "c++",
-        ".cs": "c#",
-        ".go": "go",
-        ".rb": "ruby",
-        ".php": "php",
-        ".swift": "swift",
-        ".rs": "rust",
-    }
-
-    return extension_map.get(file_extension.lower(), "unknown")
+    return EXTENSION_LANGUAGES.get(file_extension.lower(), "unknown")
 
 
 async def handle_repo_exploration(request: Request) -> dict:
@@ -205,12 +442,38 @@ async def handle_repo_exploration(request: Request) -> dict:
         if not repo_url:
             raise HTTPException(status_code=400, detail="Missing repository URL")
 
-        files = await get_repo_tree(repo_url)
+        tree: RepoTree = await load_tree(repo_url)
+        listing: dict = await tree.listing()
+        listing["repo_url"] = repo_url
 
-        return {
-            "files": files,
-            "repo_url": repo_url,
-        }
+        return listing
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def handle_tree_listing(request: Request) -> dict:
+
+    try:
+        auth_response: AuthResponse = await get_user_info(request)
+        if not auth_response.authenticated:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+
+        data = await request.json()
+        repo_url = data.get("repo_url")
+
+        if not repo_url:
+            raise HTTPException(status_code=400, detail="Missing repository URL")
+
+        tree: RepoTree = await load_tree(repo_url, data.get("sha"))
+        listing: dict = await tree.listing(
+            directory=data.get("path") or "",
+            page=int(data.get("page") or 1),
+            per_page=int(data.get("per_page") or 200),
+            pattern=data.get("pattern") or None,
+        )
+        listing["repo_url"] = repo_url
+
+        return listing
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -231,7 +494,7 @@ async def handle_file_fetch(request: Request) -> dict:
                 status_code=400, detail="Missing repository URL or file path"
             )
 
-        file_data = await get_file_content(repo_url, file_path)
+        file_data = await get_file_content(repo_url, file_path, data.get("sha"))
 
         return file_data
     except Exception as e:
@@ -257,7 +520,7 @@ async def handle_repo_conversion(request: Request) -> dict:
                 detail="Missing required fields: repo_url, file_path, source_language, or target_language",
             )
 
-        file_data = await get_file_content(repo_url, file_path)
+        file_data = await get_file_content(repo_url, file_path, data.get("sha"))
 
         converted_code = await convert_code(
             file_data["content"], source_language, target_language
@@ -271,3 +534,56 @@ async def handle_repo_conversion(request: Request) -> dict:
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def handle_streaming_conversion(request: Request) -> StreamingResponse:
+    auth_response: AuthResponse = await get_user_info(request)
+    if not auth_response.authenticated:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    data = await request.json()
+    repo_url = data.get("repo_url")
+    file_path = data.get("file_path")
+    source_language = data.get("source_language")
+    target_language = data.get("target_language")
+
+    if not repo_url or not file_path or not source_language or not target_language:
+        raise HTTPException(
+            status_code=400,
+            detail="Missing required fields: repo_url, file_path, source_language, or target_language",
+        )
+
+    try:
+        file_data = await get_file_content(repo_url, file_path, data.get("sha"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for text in stream_convert_code(
+                file_data["content"], source_language, target_language
+            ):
+                if await request.is_disconnected():
+                    return
+                yield _sse("delta", {"text": text})
+            yield _sse(
+                "done",
+                {
+                    "source_language": source_language,
+                    "target_language": target_language,
+                    "file_path": file_path,
+                },
+            )
+        except Exception as e:
+            print(f"Error streaming conversion: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
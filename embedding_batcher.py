@@ -0,0 +1,142 @@
+# built-in
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+# internal
+from metrics import current_trace, track
+
+
+@dataclass
+class _PendingEmbedding:
+    text: str
+    model: str
+    dimensions: int | None
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class EmbeddingBatcher:
+    def __init__(self, openai_client, max_batch_size: int = 64, window_ms: float = 10.0):
+        self.openai_client = openai_client
+        self.max_batch_size: int = max_batch_size
+        self.window: float = window_ms / 1000
+        self.queue: asyncio.Queue[_PendingEmbedding] = asyncio.Queue()
+        self.worker: asyncio.Task | None = None
+        self.in_flight: set[asyncio.Task] = set()
+        self.collecting: list[_PendingEmbedding] = []
+
+        self.batches: int = 0
+        self.items: int = 0
+        self.upstream_calls: int = 0
+        self.max_batch: int = 0
+        self.queue_wait_total: float = 0.0
+        self.queue_wait_max: float = 0.0
+
+    async def embed(
+        self, text: str, model: str, dimensions: int | None = None
+    ) -> list[float]:
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self.queue.put(
+            _PendingEmbedding(
+                text=text, model=model, dimensions=dimensions, future=future
+            )
+        )
+        return await future
+
+    async def _collect(self) -> list[_PendingEmbedding]:
+        self.collecting = batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        self.collecting = []
+        return batch
+
+    async def _run(self) -> None:
+        current_trace.set(None)
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            for pending in batch:
+                wait = started - pending.enqueued_at
+                self.queue_wait_total += wait
+                self.queue_wait_max = max(self.queue_wait_max, wait)
+
+            self.batches += 1
+            self.items += len(batch)
+            self.max_batch = max(self.max_batch, len(batch))
+
+            by_model: dict[tuple[str, int | None], list[_PendingEmbedding]] = {}
+            for pending in batch:
+                by_model.setdefault((pending.model, pending.dimensions), []).append(pending)
+
+            for (model, dimensions), group in by_model.items():
+                task = asyncio.create_task(self._flush(model, dimensions, group))
+                self.in_flight.add(task)
+                task.add_done_callback(self.in_flight.discard)
+
+    async def _flush(
+        self, model: str, dimensions: int | None, group: list[_PendingEmbedding]
+    ) -> None:
+        texts: list[str] = list(dict.fromkeys(pending.text for pending in group))
+        try:
+            self.upstream_calls += 1
+            with track("openai", "embeddings"):
+                options: dict = {"dimensions": dimensions} if dimensions else {}
+                response = await self.openai_client.embeddings.create(
+                    input=texts, model=model, **options
+                )
+            vectors: dict[str, list[float]] = {
+                texts[item.index]: item.embedding for item in response.data
+            }
+            for pending in group:
+                if not pending.future.done():
+                    pending.future.set_result(vectors[pending.text])
+        except Exception as e:
+            for pending in group:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "upstream_calls": self.upstream_calls,
+            "max_batch_size": self.max_batch,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "avg_queue_wait_ms": (
+                self.queue_wait_total / self.items * 1000 if self.items else 0.0
+            ),
+            "max_queue_wait_ms": self.queue_wait_max * 1000,
+            "queue_depth": self.queue.qsize(),
+        }
+
+    async def close(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+        if self.in_flight:
+            await asyncio.gather(*self.in_flight, return_exceptions=True)
+
+        abandoned: list[_PendingEmbedding] = self.collecting
+        self.collecting = []
+        while not self.queue.empty():
+            abandoned.append(self.queue.get_nowait())
+        for pending in abandoned:
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError("Embedding batcher closed"))
@@ -0,0 +1,115 @@
+# built-in
+import asyncio
+import hashlib
+import os
+import sqlite3
+from array import array
+from collections import OrderedDict
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, max_entries: int = 10000, path: str | None = None):
+        self.max_entries: int = max_entries
+        self.memory: OrderedDict[str, list[float]] = OrderedDict()
+        self.memory_hits: int = 0
+        self.disk_hits: int = 0
+        self.misses: int = 0
+        self.db: sqlite3.Connection | None = None
+        self.pending: dict[str, bytes] = {}
+        self.flush_scheduled: bool = False
+        self.flushes: int = 0
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self.db.commit()
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, model: str, text: str) -> list[float] | None:
+        key = cache_key(model, text)
+
+        vector = self.memory.get(key)
+        if vector is not None:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector
+
+        if self.db is not None:
+            if key in self.pending:
+                vector = array("f", self.pending[key]).tolist()
+                self._remember(key, vector)
+                self.disk_hits += 1
+                return vector
+            row = self.db.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                vector = array("f", row[0]).tolist()
+                self._remember(key, vector)
+                self.disk_hits += 1
+                return vector
+
+        self.misses += 1
+        return None
+
+    def set(self, model: str, text: str, vector: list[float]) -> None:
+        key = cache_key(model, text)
+        self._remember(key, vector)
+
+        if self.db is None:
+            return
+        self.pending[key] = array("f", vector).tobytes()
+        if self.flush_scheduled:
+            return
+        try:
+            asyncio.get_running_loop().call_soon(self.flush)
+            self.flush_scheduled = True
+        except RuntimeError:
+            self.flush()
+
+    def flush(self) -> None:
+        self.flush_scheduled = False
+        if self.db is None or not self.pending:
+            return
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                self.pending.items(),
+            )
+        self.pending.clear()
+        self.flushes += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "memory_entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "disk_flushes": self.flushes,
+        }
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.flush()
+            self.db.close()
+            self.db = None
@@ -1,3 +1,6 @@
+# built-in
+import time
+
 # external
 from fastapi import Request, Response, HTTPException
 from fastapi.responses import RedirectResponse
@@ -6,9 +9,30 @@ from fastapi.responses import RedirectResponse
 import clients
 from auth import get_user_info
 from models import Repository, AuthResponse
+from metrics import track
+
+
+FAVORITES_WRITTEN_COOKIE = "favorites_written"
 
 
-async def add_favorite(request: Request) -> dict[str, bool]:
+def _mark_written(response: Response) -> None:
+    response.set_cookie(
+        key=FAVORITES_WRITTEN_COOKIE,
+        value=f"{time.time():.3f}",
+        max_age=clients.settings.favorites_cache_ttl,
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def favorites_written_at(request: Request) -> float:
+    try:
+        return float(request.cookies.get(FAVORITES_WRITTEN_COOKIE, 0))
+    except ValueError:
+        return 0.0
+
+
+async def add_favorite(request: Request, response: Response) -> dict[str, bool]:
     try:
         auth_response: AuthResponse = await get_user_info(request)
         if not auth_response.authenticated:
@@ -30,32 +54,40 @@ async def add_favorite(request: Request) -> dict[str, bool]:
             stargazers_count=repo_data.get("stars"),
         )
 
-        await clients.supabase_client.table("favorites").insert(
-            {
-                "user_id": auth_response.user.id,
-                "repo_id": repository.id,
-                "repo_full_name": repository.full_name,
-                "repo_url": repository.html_url,
-                "repo_description": repository.description,
-                "repo_language": repository.language,
-                "repo_stars": repository.stargazers_count,
-            }
-        ).execute()
+        with track("supabase", "favorites.insert"):
+            await clients.supabase_client.table("favorites").insert(
+                {
+                    "user_id": auth_response.user.id,
+                    "repo_id": repository.id,
+                    "repo_full_name": repository.full_name,
+                    "repo_url": repository.html_url,
+                    "repo_description": repository.description,
+                    "repo_language": repository.language,
+                    "repo_stars": repository.stargazers_count,
+                }
+            ).execute()
+        clients.favorites_cache.delete(auth_response.user.id)
+        _mark_written(response)
 
         return {"success": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def remove_favorite(request: Request, repo_id: str) -> dict[str, bool]:
+async def remove_favorite(
+    request: Request, response: Response, repo_id: str
+) -> dict[str, bool]:
     try:
         auth_response: AuthResponse = await get_user_info(request)
         if not auth_response.authenticated:
             raise HTTPException(status_code=401, detail="Not authenticated")
 
-        await clients.supabase_client.table("favorites").delete().eq(
-            "repo_id", repo_id
-        ).eq("user_id", auth_response.user.id).execute()
+        with track("supabase", "favorites.delete"):
+            await clients.supabase_client.table("favorites").delete().eq(
+                "repo_id", repo_id
+            ).eq("user_id", auth_response.user.id).execute()
+        clients.favorites_cache.delete(auth_response.user.id)
+        _mark_written(response)
 
         return {"success": True}
     except Exception as e:
@@ -68,28 +100,53 @@ async def get_favorites(request: Request) -> list[Repository] | RedirectResponse
         if not auth_response.authenticated:
             return RedirectResponse(url="/")
 
+        return await load_favorites(auth_response.user.id, favorites_written_at(request))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def load_favorites(user_id: str, written_after: float = 0.0) -> list[Repository]:
+    cached: tuple[float, list[Repository]] | None = clients.favorites_cache.get(user_id)
+    if cached is not None and cached[0] > written_after:
+        return cached[1]
+
+    loaded_at: float = time.time()
+    with track("supabase", "favorites.select"):
         supabase_response = (
             await clients.supabase_client.table("favorites")
-            .select("*")
-            .eq("user_id", auth_response.user.id)
+            .select(
+                "repo_id, repo_full_name, repo_url, repo_description, repo_language, repo_stars"
+            )
+            .eq("user_id", user_id)
             .execute()
         )
 
-        favorites_data = supabase_response.data
+    repositories: list[Repository] = []
+    for item in supabase_response.data:
+        repositories.append(
+            Repository(
+                id=item["repo_id"],
+                full_name=item["repo_full_name"],
+                html_url=item["repo_url"],
+                description=item["repo_description"],
+                language=item["repo_language"],
+                stargazers_count=item["repo_stars"],
+            )
+        )
 
-        repositories: list[Repository] = []
+    clients.favorites_cache.set(user_id, (loaded_at, repositories))
+    return repositories
 
-        for item in favorites_data:
-            repositories.append(
-                Repository(
-                    id=item["repo_id"],
-                    full_name=item["repo_full_name"],
-                    html_url=item["repo_url"],
-                    description=item["repo_description"],
-                    language=item["repo_language"],
-                    stargazers_count=item["repo_stars"],
-                )
-            )
-        return repositories
+
+async def get_favorite_ids(auth_response: AuthResponse, request: Request) -> set[str]:
+    if not auth_response.authenticated:
+        return set()
+
+    try:
+        repositories: list[Repository] = await load_favorites(
+            auth_response.user.id, favorites_written_at(request)
+        )
+        return {repo.id for repo in repositories}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        print(f"Error loading favorite ids: {e}")
+        return set()
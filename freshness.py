@@ -0,0 +1,161 @@
+# built-in
+import hashlib
+import os
+import sqlite3
+import time
+
+# internal
+from models import Repository
+
+
+def content_fingerprint(repo: Repository, embedding_version: str) -> str:
+    raw = "\0".join(
+        (repo.full_name, repo.html_url, repo.description, repo.language, embedding_version)
+    )
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class IndexLedger:
+    def __init__(
+        self,
+        path: str | None = None,
+        max_age: float = 7 * 86400,
+        star_change_ratio: float = 0.05,
+        star_refresh_age: float = 86400,
+    ):
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self.db: sqlite3.Connection = sqlite3.connect(
+            path or ":memory:", check_same_thread=False
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS ledger "
+            "(repo_id TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, stars INTEGER NOT NULL, "
+            "indexed_at REAL NOT NULL, stars_at REAL NOT NULL)"
+        )
+        self.db.commit()
+
+        self.max_age: float = max_age
+        self.star_change_ratio: float = star_change_ratio
+        self.star_refresh_age: float = star_refresh_age
+
+        self.staged_indexed: dict[str, tuple[str, int, float, float]] = {}
+        self.staged_stars: dict[str, tuple[int, float]] = {}
+
+        self.decisions: dict[str, int] = {
+            "new": 0,
+            "changed": 0,
+            "stale": 0,
+            "stars": 0,
+            "fresh": 0,
+        }
+
+    def _stars_changed(self, previous: int, current: int, stars_at: float, now: float) -> bool:
+        if previous == current:
+            return False
+        if now - stars_at >= self.star_refresh_age:
+            return True
+        return abs(current - previous) > self.star_change_ratio * max(previous, 1)
+
+    def classify(
+        self, repositories: list[Repository], embedding_version: str
+    ) -> dict[str, list[Repository]]:
+        rows: dict[str, tuple] = {}
+        ids = [repo.id for repo in repositories]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for row in self.db.execute(
+                f"SELECT repo_id, fingerprint, stars, indexed_at, stars_at FROM ledger "
+                f"WHERE repo_id IN ({placeholders})",
+                chunk,
+            ):
+                rows[row[0]] = row[1:]
+
+        for repo_id in ids:
+            staged = self.staged_indexed.get(repo_id)
+            if staged is not None:
+                rows[repo_id] = staged
+            stars = self.staged_stars.get(repo_id)
+            if stars is not None and repo_id in rows:
+                fingerprint, _, indexed_at, _ = rows[repo_id]
+                rows[repo_id] = (fingerprint, stars[0], indexed_at, stars[1])
+
+        now = time.time()
+        groups: dict[str, list[Repository]] = {name: [] for name in self.decisions}
+        for repo in repositories:
+            row = rows.get(repo.id)
+            if row is None:
+                decision = "new"
+            else:
+                fingerprint, stars, indexed_at, stars_at = row
+                if fingerprint != content_fingerprint(repo, embedding_version):
+                    decision = "changed"
+                elif now - indexed_at >= self.max_age:
+                    decision = "stale"
+                elif self._stars_changed(stars, repo.stargazers_count, stars_at, now):
+                    decision = "stars"
+                else:
+                    decision = "fresh"
+            groups[decision].append(repo)
+            self.decisions[decision] += 1
+        return groups
+
+    def stage_indexed(self, repositories: list[Repository], embedding_version: str) -> None:
+        now = time.time()
+        for repo in repositories:
+            self.staged_stars.pop(repo.id, None)
+            self.staged_indexed[repo.id] = (
+                content_fingerprint(repo, embedding_version),
+                repo.stargazers_count,
+                now,
+                now,
+            )
+
+    def stage_stars(self, repositories: list[Repository]) -> None:
+        now = time.time()
+        for repo in repositories:
+            staged = self.staged_indexed.get(repo.id)
+            if staged is not None:
+                self.staged_indexed[repo.id] = (staged[0], repo.stargazers_count, staged[2], now)
+            else:
+                self.staged_stars[repo.id] = (repo.stargazers_count, now)
+
+    def staged(self) -> tuple[dict, dict]:
+        return dict(self.staged_indexed), dict(self.staged_stars)
+
+    def flush(self, staged: tuple[dict, dict] | None = None) -> None:
+        indexed, stars = staged if staged is not None else self.staged()
+        if not indexed and not stars:
+            return
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO ledger (repo_id, fingerprint, stars, indexed_at, stars_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(repo_id, *row) for repo_id, row in indexed.items()],
+            )
+            self.db.executemany(
+                "UPDATE ledger SET stars = ?, stars_at = ? WHERE repo_id = ?",
+                [(count, stars_at, repo_id) for repo_id, (count, stars_at) in stars.items()],
+            )
+        for repo_id, row in indexed.items():
+            if self.staged_indexed.get(repo_id) == row:
+                del self.staged_indexed[repo_id]
+        for repo_id, row in stars.items():
+            if self.staged_stars.get(repo_id) == row:
+                del self.staged_stars[repo_id]
+
+    def stats(self) -> dict[str, int]:
+        entries = self.db.execute("SELECT COUNT(*) FROM ledger").fetchone()[0]
+        return {
+            "entries": entries,
+            "staged": len(self.staged_indexed) + len(self.staged_stars),
+            **self.decisions,
+        }
+
+    def close(self) -> None:
+        self.db.close()
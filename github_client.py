@@ -0,0 +1,241 @@
+# built-in
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# external
+import httpx
+
+# internal
+from metrics import track
+
+
+GITHUB_API_URL = "https://api.github.com"
+
+COMMIT_SHA_PATTERN = re.compile(r"(?<![0-9a-f])[0-9a-f]{40}(?![0-9a-f])")
+
+
+@dataclass
+class _CachedResponse:
+    etag: str | None
+    last_modified: str | None
+    content: bytes
+    headers: dict[str, str]
+
+
+@dataclass
+class RateLimit:
+    limit: int | None = None
+    remaining: int | None = None
+    reset: float = 0.0
+
+
+class GitHubClient:
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        token: str,
+        cache_size: int = 2048,
+        cache_bytes: int = 16777216,
+        reserve: int = 5,
+        max_wait: float = 30.0,
+    ):
+        self.http_client: httpx.AsyncClient = http_client
+        self.token: str = token
+        self.cache_size: int = cache_size
+        self.cache_bytes: int = cache_bytes
+        self.cache_used: int = 0
+        self.reserve: int = reserve
+        self.max_wait: float = max_wait
+        self.cache: OrderedDict[tuple, _CachedResponse] = OrderedDict()
+        self.rate_limits: dict[str, RateLimit] = {}
+        self.locks: dict[str, asyncio.Lock] = {}
+
+        self.requests: int = 0
+        self.not_modified: int = 0
+        self.stale_served: int = 0
+        self.throttled_seconds: float = 0.0
+
+    def headers(self, accept: str = "application/vnd.github.v3+json") -> dict[str, str]:
+        return {"Accept": accept, "Authorization": f"token {self.token}"}
+
+    @staticmethod
+    def _resource(url: str) -> str:
+        return "search" if url.startswith(f"{GITHUB_API_URL}/search/") else "core"
+
+    def _update_rate_limit(self, response: httpx.Response) -> None:
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+
+        resource = response.headers.get("X-RateLimit-Resource") or self._resource(
+            str(response.request.url)
+        )
+        rate_limit = self.rate_limits.setdefault(resource, RateLimit())
+        rate_limit.remaining = int(remaining)
+        rate_limit.limit = int(response.headers.get("X-RateLimit-Limit", 0)) or None
+        rate_limit.reset = float(response.headers.get("X-RateLimit-Reset", 0))
+
+    def _quota_wait(self, resource: str) -> float:
+        rate_limit = self.rate_limits.get(resource)
+        if rate_limit is None or rate_limit.remaining is None:
+            return 0.0
+        if rate_limit.remaining > self.reserve:
+            return 0.0
+        return max(rate_limit.reset - time.time(), 0.0)
+
+    def blocked_for(self, resource: str) -> float:
+        wait = self._quota_wait(resource)
+        return wait if wait > self.max_wait else 0.0
+
+    async def _wait_for_quota(self, resource: str) -> None:
+        lock = self.locks.setdefault(resource, asyncio.Lock())
+        async with lock:
+            wait = self._quota_wait(resource)
+            if wait <= 0:
+                return
+            if wait > self.max_wait:
+                raise RuntimeError(
+                    f"GitHub {resource} rate limit exhausted, resets in {int(wait)}s"
+                )
+            self.throttled_seconds += wait
+            await asyncio.sleep(wait)
+            self.rate_limits.pop(resource, None)
+
+    def _from_cache(self, url: str, cached: _CachedResponse) -> httpx.Response:
+        return httpx.Response(
+            200,
+            content=cached.content,
+            headers=cached.headers,
+            request=httpx.Request("GET", url),
+        )
+
+    def _evict(self, key: tuple) -> None:
+        cached = self.cache.pop(key, None)
+        if cached is not None:
+            self.cache_used -= len(cached.content)
+
+    def _store(self, key: tuple, response: httpx.Response) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        self._evict(key)
+        if not etag and not last_modified:
+            return
+        if len(response.content) > self.cache_bytes or COMMIT_SHA_PATTERN.search(
+            f"{key[0]} {key[1]}"
+        ):
+            return
+
+        self.cache[key] = _CachedResponse(
+            etag=etag,
+            last_modified=last_modified,
+            content=response.content,
+            headers={
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() in ("content-type", "etag", "last-modified")
+            },
+        )
+        self.cache_used += len(response.content)
+        while len(self.cache) > self.cache_size or self.cache_used > self.cache_bytes:
+            self._evict(next(iter(self.cache)))
+
+    async def get(
+        self,
+        path: str,
+        params: dict | None = None,
+        accept: str = "application/vnd.github.v3+json",
+    ) -> httpx.Response:
+        url = path if path.startswith("http") else f"{GITHUB_API_URL}{path}"
+        key = (url, tuple(sorted((params or {}).items())), accept)
+        resource = self._resource(url)
+        cached = self.cache.get(key)
+
+        if cached is not None and self._quota_wait(resource) > 0:
+            self.stale_served += 1
+            return self._from_cache(url, cached)
+
+        await self._wait_for_quota(resource)
+
+        headers = self.headers(accept)
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        self.requests += 1
+        with track("github", resource):
+            response = await self.http_client.get(url, headers=headers, params=params)
+        self._update_rate_limit(response)
+
+        if response.status_code == 304 and cached is not None:
+            self.not_modified += 1
+            self.cache.move_to_end(key)
+            return self._from_cache(url, cached)
+
+        if response.status_code in (403, 429) and self._quota_wait(resource) > 0:
+            if cached is not None:
+                self.stale_served += 1
+                return self._from_cache(url, cached)
+            await self._wait_for_quota(resource)
+            self.requests += 1
+            with track("github", resource):
+                response = await self.http_client.get(
+                    url, headers=headers, params=params
+                )
+            self._update_rate_limit(response)
+
+        if response.status_code == 200:
+            self._store(key, response)
+        return response
+
+    async def download(
+        self,
+        path: str,
+        max_bytes: int,
+        accept: str = "application/vnd.github.raw",
+    ) -> bytes:
+        url = path if path.startswith("http") else f"{GITHUB_API_URL}{path}"
+        await self._wait_for_quota(self._resource(url))
+
+        self.requests += 1
+        with track("github", "download"):
+            async with self.http_client.stream(
+                "GET", url, headers=self.headers(accept)
+            ) as response:
+                self._update_rate_limit(response)
+                response.raise_for_status()
+
+                declared = response.headers.get("Content-Length")
+                if declared is not None and int(declared) > max_bytes:
+                    raise ValueError("File too large to convert")
+
+                chunks: list[bytes] = []
+                received = 0
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > max_bytes:
+                        raise ValueError("File too large to convert")
+                    chunks.append(chunk)
+                return b"".join(chunks)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "stale_served": self.stale_served,
+            "throttled_seconds": self.throttled_seconds,
+            "cache_entries": len(self.cache),
+            "cache_bytes": self.cache_used,
+            "rate_limits": {
+                resource: {
+                    "limit": rate_limit.limit,
+                    "remaining": rate_limit.remaining,
+                    "reset": rate_limit.reset,
+                }
+                for resource, rate_limit in self.rate_limits.items()
+            },
+        }
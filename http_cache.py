@@ -0,0 +1,164 @@
+# built-in
+import gzip
+import hashlib
+
+# external
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_TYPES: tuple[str, ...] = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+VALIDATED_TYPES: tuple[str, ...] = ("text/html", "application/json")
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def supported_encodings() -> tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str, available: tuple[str, ...]) -> str | None:
+    accepted: set[str] = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip())
+
+    for encoding in available:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else 5)
+    return gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+
+
+def entity_tag(body: bytes, weak: bool = True) -> str:
+    digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class ResponseOptimizer:
+    def __init__(self, app: ASGIApp, minimum_size: int = 500):
+        self.app: ASGIApp = app
+        self.minimum_size: int = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(
+            self.minimum_size,
+            scope["method"] in ("GET", "HEAD"),
+            Headers(scope=scope),
+            send,
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    def __init__(
+        self, minimum_size: int, validate: bool, request_headers: Headers, send: Send
+    ):
+        self.minimum_size: int = minimum_size
+        self.validate: bool = validate
+        self.request_headers: Headers = request_headers
+        self.downstream: Send = send
+        self.start: Message | None = None
+        self.buffering: bool = False
+        self.chunks: list[bytes] = []
+
+    def _should_buffer(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        if "content-length" not in headers or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if self.validate and content_type.startswith(VALIDATED_TYPES):
+            return True
+        return is_compressible(content_type)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.buffering = self._should_buffer(message)
+            if self.buffering:
+                self.start = message
+                return
+        elif message["type"] == "http.response.body" and self.buffering:
+            self.chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._finish(b"".join(self.chunks))
+            return
+        await self.downstream(message)
+
+    async def _finish(self, body: bytes) -> None:
+        status: int = self.start["status"]
+        headers = MutableHeaders(raw=list(self.start["headers"]))
+        content_type = headers.get("content-type", "")
+
+        if (
+            self.validate
+            and status == 200
+            and content_type.startswith(VALIDATED_TYPES)
+            and "etag" not in headers
+        ):
+            etag = entity_tag(body)
+            headers["ETag"] = etag
+            if "cache-control" not in headers:
+                private = "access_token" in self.request_headers.get("cookie", "")
+                headers["Cache-Control"] = "private, no-cache" if private else "no-cache"
+            if etag_matches(self.request_headers.get("if-none-match", ""), etag):
+                del headers["content-length"]
+                del headers["content-type"]
+                await self.downstream(
+                    {"type": "http.response.start", "status": 304, "headers": headers.raw}
+                )
+                await self.downstream({"type": "http.response.body", "body": b""})
+                return
+
+        if len(body) >= self.minimum_size and is_compressible(content_type):
+            encoding = choose_encoding(
+                self.request_headers.get("accept-encoding", ""), supported_encodings()
+            )
+            if encoding is not None:
+                body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+
+        await self.downstream(
+            {"type": "http.response.start", "status": status, "headers": headers.raw}
+        )
+        await self.downstream({"type": "http.response.body", "body": body})
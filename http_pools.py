@@ -0,0 +1,166 @@
+# built-in
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable
+
+# external
+import httpx
+
+
+@dataclass
+class PoolConfig:
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    pool_timeout: float = 10.0
+    http2: bool = True
+    warmup_url: str | None = None
+    warmup_connections: int = 1
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            self.read_timeout,
+            connect=self.connect_timeout,
+            pool=self.pool_timeout,
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self.stream: httpx.AsyncByteStream = stream
+        self.release: Callable[[], None] | None = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            if self.release is not None:
+                self.release()
+                self.release = None
+
+
+class PoolTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_connections: int):
+        self.transport: httpx.AsyncBaseTransport = transport
+        self.max_connections: int = max_connections
+
+        self.active: int = 0
+        self.peak_active: int = 0
+        self.requests: int = 0
+        self.errors: int = 0
+        self.pool_timeouts: int = 0
+
+    def _release(self) -> None:
+        self.active -= 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        self.requests += 1
+        try:
+            response = await self.transport.handle_async_request(request)
+        except httpx.PoolTimeout:
+            self.pool_timeouts += 1
+            self._release()
+            raise
+        except Exception:
+            self.errors += 1
+            self._release()
+            raise
+
+        if isinstance(response.stream, httpx.ByteStream):
+            self._release()
+        else:
+            response.stream = _ReleasingStream(response.stream, self._release)
+        return response
+
+    def connections(self) -> tuple[int, int, int]:
+        pool = getattr(self.transport, "_pool", None)
+        if pool is None:
+            return 0, 0, 0
+        connections = pool.connections
+        idle = sum(1 for connection in connections if connection.is_idle())
+        http2 = sum(
+            1 for connection in connections if "HTTP/2" in connection.info()
+        )
+        return len(connections), idle, http2
+
+    def stats(self) -> dict[str, float]:
+        connections, idle, http2 = self.connections()
+        return {
+            "active_requests": self.active,
+            "peak_active_requests": self.peak_active,
+            "max_connections": self.max_connections,
+            "utilization": self.active / self.max_connections,
+            "requests": self.requests,
+            "errors": self.errors,
+            "pool_timeouts": self.pool_timeouts,
+            "open_connections": connections,
+            "idle_connections": idle,
+            "http2_connections": http2,
+        }
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class HTTPPools:
+    def __init__(
+        self,
+        configs: dict[str, PoolConfig],
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.configs: dict[str, PoolConfig] = configs
+        self.transports: dict[str, PoolTransport] = {}
+        self.clients: dict[str, httpx.AsyncClient] = {}
+
+        for name, config in configs.items():
+            inner = transport or httpx.AsyncHTTPTransport(
+                http2=config.http2, limits=config.limits()
+            )
+            self.transports[name] = PoolTransport(inner, config.max_connections)
+            self.clients[name] = httpx.AsyncClient(
+                transport=self.transports[name], timeout=config.timeout()
+            )
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        return self.clients[name]
+
+    async def _warm_up(self, name: str, config: PoolConfig) -> None:
+        requests = [
+            self.clients[name].head(config.warmup_url)
+            for _ in range(min(config.warmup_connections, config.max_connections))
+        ]
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            print(f"Error warming up {name} connections: {failures[0]}")
+
+    async def warm_up(self) -> None:
+        await asyncio.gather(
+            *(
+                self._warm_up(name, config)
+                for name, config in self.configs.items()
+                if config.warmup_url and config.warmup_connections > 0
+            )
+        )
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {name: transport.stats() for name, transport in self.transports.items()}
+
+    async def close(self) -> None:
+        for client in self.clients.values():
+            await client.aclose()
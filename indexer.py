@@ -0,0 +1,128 @@
+# built-in
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+# internal
+from models import Repository
+
+
+class IndexWriter:
+    def __init__(
+        self,
+        write: Callable[[list[Repository]], Awaitable[list[str]]],
+        max_queue: int = 1000,
+        batch_size: int = 50,
+        window_ms: float = 200.0,
+        max_retries: int = 3,
+    ):
+        self.write = write
+        self.queue: asyncio.Queue[Repository] = asyncio.Queue(maxsize=max_queue)
+        self.batch_size: int = batch_size
+        self.window: float = window_ms / 1000
+        self.max_retries: int = max_retries
+        self.worker: asyncio.Task | None = None
+        self.closing: bool = False
+
+        self.enqueued: int = 0
+        self.dropped: int = 0
+        self.written: int = 0
+        self.failed: int = 0
+        self.retries: int = 0
+
+    def start(self) -> None:
+        if self.worker is None or self.worker.done():
+            self.closing = False
+            self.worker = asyncio.create_task(self._run())
+
+    def enqueue(self, repositories: list[Repository]) -> int:
+        if self.closing:
+            self.dropped += len(repositories)
+            return 0
+
+        accepted = 0
+        for repo in repositories:
+            try:
+                self.queue.put_nowait(repo)
+                accepted += 1
+            except asyncio.QueueFull:
+                self.dropped += len(repositories) - accepted
+                print(
+                    f"Index queue full, dropped {len(repositories) - accepted} repositories"
+                )
+                break
+        self.enqueued += accepted
+        return accepted
+
+    async def _collect(self) -> tuple[list[Repository], int]:
+        batch: dict[str, Repository] = {}
+        repo = await self.queue.get()
+        batch[repo.id] = repo
+        taken = 1
+        deadline = time.perf_counter() + self.window
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 and self.queue.empty():
+                break
+            try:
+                if remaining > 0:
+                    repo = await asyncio.wait_for(self.queue.get(), remaining)
+                else:
+                    repo = self.queue.get_nowait()
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+            batch[repo.id] = repo
+            taken += 1
+
+        return list(batch.values()), taken
+
+    async def _run(self) -> None:
+        while True:
+            batch, taken = await self._collect()
+            try:
+                await self._write_with_retry(batch)
+            finally:
+                for _ in range(taken):
+                    self.queue.task_done()
+
+    async def _write_with_retry(self, batch: list[Repository]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.write(batch)
+                self.written += len(batch)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += len(batch)
+                    print(f"Error writing {len(batch)} repositories to index: {e}")
+                    return
+                self.retries += 1
+                await asyncio.sleep(0.5 * 2**attempt)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "retries": self.retries,
+        }
+
+    async def close(self, timeout: float = 10.0) -> None:
+        self.closing = True
+        if self.worker is None:
+            return
+
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Index queue not drained, {self.queue.qsize()} repositories lost")
+
+        self.worker.cancel()
+        try:
+            await self.worker
+        except asyncio.CancelledError:
+            pass
+        self.worker = None
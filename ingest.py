@@ -0,0 +1,217 @@
+# built-in
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from functools import partial
+from itertools import product
+
+# internal
+import clients
+from models import Repository, SearchParams
+from search import checkpoint_indexes, parallel_upsert, search_github
+
+
+GITHUB_SEARCH_RESULT_LIMIT = 1000
+
+
+class Checkpoint:
+    def __init__(self, path: str | None):
+        self.path: str | None = path
+        self.completed: set[str] = set()
+        self.seen: set[str] = set()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data: dict = json.load(f)
+            self.completed = set(data.get("completed", []))
+            self.seen = set(data.get("seen", []))
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, suffix=".json", delete=False, encoding="utf-8"
+        ) as f:
+            json.dump(
+                {
+                    "completed": sorted(self.completed),
+                    "seen": sorted(self.seen),
+                },
+                f,
+            )
+        os.replace(f.name, self.path)
+
+
+class Ingestion:
+    def __init__(self, args: argparse.Namespace):
+        self.args: argparse.Namespace = args
+        self.checkpoint: Checkpoint = Checkpoint(args.checkpoint or None)
+        self.crawl_slots: asyncio.Semaphore = asyncio.Semaphore(args.crawl_concurrency)
+        self.upsert_slots: asyncio.Semaphore = asyncio.Semaphore(args.concurrency)
+        self.started: float = time.perf_counter()
+        self.queued: set[str] = set()
+        self.unsaved: list[tuple[str, list[str], bool]] = []
+        self.saved_at: float = time.perf_counter()
+
+        self.pages: int = 0
+        self.ingested: int = 0
+        self.skipped: int = 0
+        self.failed_pages: int = 0
+
+    def seeds(self) -> list[tuple[str, str | None]]:
+        return list(product(self.args.topic, self.args.language or [None]))
+
+    @staticmethod
+    def seed_key(topic: str, language: str | None) -> str:
+        return f"{topic}|{language or ''}"
+
+    def report(self, label: str) -> None:
+        elapsed = time.perf_counter() - self.started
+        rate = self.ingested / elapsed if elapsed > 0 else 0.0
+        print(
+            f"{label}: pages={self.pages} ingested={self.ingested} skipped={self.skipped} "
+            f"failed_pages={self.failed_pages} elapsed={elapsed:.1f}s rate={rate:.1f} repos/s"
+        )
+
+    async def upsert(self, repositories: list[Repository]) -> list[str]:
+        indexed: list[str] = []
+        async with self.upsert_slots:
+            for start in range(0, len(repositories), self.args.batch_size):
+                indexed += await parallel_upsert(
+                    repositories[start : start + self.args.batch_size]
+                )
+        return indexed
+
+    async def crawl_page(
+        self, params: SearchParams, seed: str, page: int
+    ) -> list[Repository] | None:
+        async with self.crawl_slots:
+            try:
+                return await search_github(params, limit=self.args.per_page, page=page)
+            except Exception as e:
+                print(f"Error crawling {seed} page {page}: {e}")
+                self.failed_pages += 1
+                return None
+
+    async def ingest_seed(self, topic: str, language: str | None) -> None:
+        seed = self.seed_key(topic, language)
+        params = SearchParams(
+            keywords=[f"topic:{topic}"] if self.args.topic_qualifier else [topic],
+            languages=[language] if language else [],
+        )
+        max_pages = min(
+            self.args.pages, GITHUB_SEARCH_RESULT_LIMIT // self.args.per_page
+        )
+        pending: set[asyncio.Task] = set()
+
+        for page in range(1, max_pages + 1):
+            page_key = f"{seed}|{page}"
+            if page_key in self.checkpoint.completed:
+                continue
+
+            repositories = await self.crawl_page(params, seed, page)
+            if repositories is None:
+                break
+
+            fresh = [
+                repo
+                for repo in repositories
+                if repo.id not in self.checkpoint.seen and repo.id not in self.queued
+            ]
+            self.queued.update(repo.id for repo in fresh)
+            self.skipped += len(repositories) - len(fresh)
+            task = asyncio.create_task(self.upsert(fresh))
+            task.add_done_callback(partial(self.page_done, fresh=fresh, page_key=page_key))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+            if len(repositories) < self.args.per_page:
+                break
+
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def page_done(self, task: asyncio.Task, fresh: list[Repository], page_key: str) -> None:
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            print(f"Error ingesting {page_key}: {error}")
+            self.queued.difference_update(repo.id for repo in fresh)
+            self.failed_pages += 1
+            return
+
+        indexed = set(task.result())
+        written = [repo.id for repo in fresh if repo.id in indexed]
+        missing = [repo.id for repo in fresh if repo.id not in indexed]
+        if missing:
+            print(f"Error ingesting {page_key}: {len(missing)} repositories were not indexed")
+            self.queued.difference_update(missing)
+
+        self.pages += 1
+        self.ingested += len(written)
+        self.unsaved.append((page_key, written, not missing))
+        if time.perf_counter() - self.saved_at >= self.args.save_interval:
+            self.save()
+        self.report("progress")
+
+    def save(self) -> None:
+        checkpoint_indexes()
+        for page_key, written, complete in self.unsaved:
+            self.checkpoint.seen.update(written)
+            if complete:
+                self.checkpoint.completed.add(page_key)
+        self.checkpoint.save()
+        self.unsaved = []
+        self.saved_at = time.perf_counter()
+
+    async def run(self) -> None:
+        await asyncio.gather(
+            *(self.ingest_seed(topic, language) for topic, language in self.seeds())
+        )
+        self.save()
+        self.report("done")
+
+
+async def run(args: argparse.Namespace) -> None:
+    os.environ["EMBEDDING_BATCH_SIZE"] = str(args.batch_size)
+    await clients.setup_clients()
+    try:
+        await Ingestion(args).run()
+    finally:
+        await clients.close_clients()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Crawl GitHub search results and pre-populate the vector index."
+    )
+    parser.add_argument("--topic", action="append", required=True)
+    parser.add_argument("--language", action="append")
+    parser.add_argument(
+        "--topic-qualifier",
+        action="store_true",
+        help="search with topic:<name> instead of a free-text keyword",
+    )
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--crawl-concurrency", type=int, default=2)
+    parser.add_argument("--checkpoint", default="data/ingest_checkpoint.json")
+    parser.add_argument(
+        "--save-interval",
+        type=float,
+        default=30.0,
+        help="seconds between saving the indexes, ledger and checkpoint",
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+# built-in
+import asyncio
+import fnmatch
+import io
+import os
+import posixpath
+import socket
+import sqlite3
+import time
+import uuid
+import zipfile
+
+# external
+from fastapi import Request, HTTPException
+from fastapi.responses import Response
+
+# internal
+import clients
+from auth import get_user_info
+from models import AuthResponse
+from repo_tree import RepoTree, load_tree
+from converter import (
+    FILE_SIZE_LIMIT,
+    LANGUAGE_EXTENSIONS,
+    conversion_usage,
+    convert_code,
+    detect_language,
+    get_file_content,
+)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    repo_url TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    source_language TEXT,
+    target_language TEXT NOT NULL,
+    path_filter TEXT,
+    status TEXT NOT NULL,
+    token_budget INTEGER NOT NULL,
+    tokens_used INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    owner TEXT,
+    lease_expires REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    blob_sha TEXT NOT NULL,
+    source_language TEXT NOT NULL,
+    status TEXT NOT NULL,
+    converted_code TEXT,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    PRIMARY KEY (job_id, path)
+);
+"""
+
+MIGRATIONS: dict[str, str] = {
+    "owner": "ALTER TABLE jobs ADD COLUMN owner TEXT",
+    "lease_expires": "ALTER TABLE jobs ADD COLUMN lease_expires REAL NOT NULL DEFAULT 0",
+}
+
+OWNED = "AND EXISTS (SELECT 1 FROM jobs WHERE jobs.id = job_files.job_id AND jobs.owner = ?)"
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def output_path(path: str, target_language: str) -> str:
+    extension = LANGUAGE_EXTENSIONS.get(target_language)
+    if not extension:
+        return path
+    root, _ = os.path.splitext(path)
+    return root + extension
+
+
+class JobManager:
+    def __init__(
+        self,
+        path: str,
+        concurrency: int = 4,
+        default_token_budget: int = 500000,
+        lease_seconds: float = 60.0,
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        columns = {row["name"] for row in self.db.execute("PRAGMA table_info(jobs)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self.db.execute(statement)
+        self.db.commit()
+
+        self.concurrency: int = concurrency
+        self.default_token_budget: int = default_token_budget
+        self.lease_seconds: float = lease_seconds
+        self.owner: str = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.queue: asyncio.Queue[str] = asyncio.Queue()
+        self.queued: set[str] = set()
+        self.worker: asyncio.Task | None = None
+        self.heartbeat: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self.worker = asyncio.create_task(self._run())
+        self.heartbeat = asyncio.create_task(self._maintain())
+
+    async def close(self) -> None:
+        for task in (self.worker, self.heartbeat):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.worker = self.heartbeat = None
+        self.db.execute(
+            "UPDATE jobs SET lease_expires = 0 WHERE owner = ? AND status = 'running'",
+            (self.owner,),
+        )
+        self.db.commit()
+        self.db.close()
+
+    def _enqueue(self, job_id: str) -> None:
+        if job_id not in self.queued:
+            self.queued.add(job_id)
+            self.queue.put_nowait(job_id)
+
+    async def _maintain(self) -> None:
+        while True:
+            now = time.time()
+            self.db.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE owner = ? AND status = 'running'",
+                (now + self.lease_seconds, self.owner),
+            )
+            self.db.commit()
+            for row in self.db.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') "
+                "AND (owner IS NULL OR lease_expires < ?) ORDER BY created_at",
+                (now,),
+            ).fetchall():
+                self._enqueue(row["id"])
+            await asyncio.sleep(self.lease_seconds / 3)
+
+    def _claim(self, job_id: str) -> bool:
+        now = time.time()
+        claimed = self.db.execute(
+            "UPDATE jobs SET owner = ?, lease_expires = ?, status = 'running', updated_at = ? "
+            "WHERE id = ? AND status IN ('queued', 'running') "
+            "AND (owner IS NULL OR owner = ? OR lease_expires < ?)",
+            (self.owner, now + self.lease_seconds, now, job_id, self.owner, now),
+        ).rowcount
+        if claimed:
+            self.db.execute(
+                "UPDATE job_files SET status = 'pending' WHERE job_id = ? AND status = 'running'",
+                (job_id,),
+            )
+        self.db.commit()
+        return bool(claimed)
+
+    def _set_job(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self.db.execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ? AND owner = ?",
+            (*fields.values(), job_id, self.owner),
+        )
+        self.db.commit()
+
+    def _file_counts(self, job_id: str) -> dict[str, int]:
+        return {
+            row["status"]: row["count"]
+            for row in self.db.execute(
+                "SELECT status, COUNT(*) AS count FROM job_files WHERE job_id = ? GROUP BY status",
+                (job_id,),
+            )
+        }
+
+    def _tokens_used(self, job_id: str) -> int:
+        return self.db.execute(
+            "SELECT COALESCE(SUM(tokens), 0) FROM job_files "
+            "WHERE job_id = ? AND status IN ('done', 'failed')",
+            (job_id,),
+        ).fetchone()[0]
+
+    async def submit(
+        self,
+        user_id: str,
+        repo_url: str,
+        target_language: str,
+        source_language: str | None = None,
+        path_filter: str | None = None,
+        token_budget: int | None = None,
+    ) -> str:
+        tree: RepoTree = await load_tree(repo_url)
+        files: list[dict] = []
+        for entry in await tree.walk():
+            if path_filter and not fnmatch.fnmatch(entry["path"], path_filter):
+                continue
+            if (entry.get("size") or 0) > FILE_SIZE_LIMIT:
+                continue
+            language = detect_language(posixpath.splitext(entry["path"])[1])
+            if language == "unknown" or language == target_language:
+                continue
+            if source_language and language != source_language:
+                continue
+            files.append({**entry, "language": language})
+
+        if not files:
+            raise ValueError("No convertible files match the filter")
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self.db.execute(
+            "INSERT INTO jobs (id, user_id, repo_url, sha, source_language, target_language, "
+            "path_filter, status, token_budget, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+            (
+                job_id,
+                user_id,
+                repo_url,
+                tree.sha,
+                source_language,
+                target_language,
+                path_filter,
+                min(token_budget or self.default_token_budget, self.default_token_budget),
+                now,
+                now,
+            ),
+        )
+        self.db.executemany(
+            "INSERT INTO job_files (job_id, path, blob_sha, source_language, status) "
+            "VALUES (?, ?, ?, ?, 'pending')",
+            [(job_id, entry["path"], entry["sha"], entry["language"]) for entry in files],
+        )
+        self.db.commit()
+
+        self._enqueue(job_id)
+        return job_id
+
+    async def _run(self) -> None:
+        while True:
+            job_id = await self.queue.get()
+            self.queued.discard(job_id)
+            try:
+                await self._process(job_id)
+            except Exception as e:
+                print(f"Error processing conversion job {job_id}: {e}")
+                self._set_job(job_id, status="failed", error=str(e))
+
+    async def _process(self, job_id: str) -> None:
+        job = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None or job["status"] not in ("queued", "running"):
+            return
+        if not self._claim(job_id):
+            return
+
+        pending = self.db.execute(
+            "SELECT path, source_language FROM job_files WHERE job_id = ? AND status = 'pending' ORDER BY path",
+            (job_id,),
+        ).fetchall()
+
+        reserved: int = 0
+        budget_exhausted = False
+        lease_lost = False
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def convert_file(path: str, source_language: str) -> None:
+            nonlocal reserved, budget_exhausted, lease_lost
+            async with semaphore:
+                if budget_exhausted or lease_lost:
+                    return
+                if not self.db.execute(
+                    f"UPDATE job_files SET status = 'running' "
+                    f"WHERE job_id = ? AND path = ? AND status = 'pending' {OWNED}",
+                    (job_id, path, self.owner),
+                ).rowcount:
+                    lease_lost = True
+                    return
+                self.db.commit()
+
+                usage: list[int] = []
+                conversion_usage.set(usage)
+                reservation = 0
+                try:
+                    file_data = await get_file_content(job["repo_url"], path, job["sha"])
+                    estimated = estimate_tokens(file_data["content"]) * 2
+                    if self._tokens_used(job_id) + reserved + estimated > job["token_budget"]:
+                        budget_exhausted = True
+                        self.db.execute(
+                            f"UPDATE job_files SET status = 'pending' WHERE job_id = ? AND path = ? {OWNED}",
+                            (job_id, path, self.owner),
+                        )
+                        self.db.commit()
+                        return
+
+                    reservation = estimated
+                    reserved += reservation
+                    converted = await convert_code(
+                        file_data["content"], source_language, job["target_language"]
+                    )
+                    self.db.execute(
+                        f"UPDATE job_files SET status = 'done', converted_code = ?, tokens = ?, error = NULL "
+                        f"WHERE job_id = ? AND path = ? {OWNED}",
+                        (converted, sum(usage), job_id, path, self.owner),
+                    )
+                except Exception as e:
+                    self.db.execute(
+                        f"UPDATE job_files SET status = 'failed', tokens = ?, error = ? "
+                        f"WHERE job_id = ? AND path = ? {OWNED}",
+                        (sum(usage), str(e), job_id, path, self.owner),
+                    )
+                finally:
+                    reserved -= reservation
+                self._set_job(job_id, tokens_used=self._tokens_used(job_id))
+
+        await asyncio.gather(
+            *(convert_file(row["path"], row["source_language"]) for row in pending)
+        )
+        if lease_lost:
+            return
+
+        counts = self._file_counts(job_id)
+        error = None
+        if budget_exhausted:
+            status = "budget_exhausted"
+        elif counts.get("failed") and not counts.get("done"):
+            status, error = "failed", "No files could be converted"
+        elif counts.get("failed"):
+            status, error = "partial", f"{counts['failed']} files failed to convert"
+        else:
+            status = "completed"
+        self._set_job(
+            job_id, status=status, error=error, tokens_used=self._tokens_used(job_id)
+        )
+
+    def status(self, job_id: str, user_id: str) -> dict:
+        job = self.db.execute(
+            "SELECT * FROM jobs WHERE id = ? AND user_id = ?", (job_id, user_id)
+        ).fetchone()
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        counts = self._file_counts(job_id)
+        total = sum(counts.values())
+        finished = counts.get("done", 0) + counts.get("failed", 0)
+        return {
+            "id": job["id"],
+            "repo_url": job["repo_url"],
+            "sha": job["sha"],
+            "source_language": job["source_language"],
+            "target_language": job["target_language"],
+            "path_filter": job["path_filter"],
+            "status": job["status"],
+            "error": job["error"],
+            "token_budget": job["token_budget"],
+            "tokens_used": job["tokens_used"],
+            "total": total,
+            "files": counts,
+            "progress": finished / total if total else 1.0,
+        }
+
+    def files(self, job_id: str, user_id: str) -> list[dict]:
+        self.status(job_id, user_id)
+        return [
+            {
+                "path": row["path"],
+                "status": row["status"],
+                "source_language": row["source_language"],
+                "error": row["error"],
+            }
+            for row in self.db.execute(
+                "SELECT path, status, source_language, error FROM job_files WHERE job_id = ? ORDER BY path",
+                (job_id,),
+            )
+        ]
+
+    def archive(self, job_id: str, user_id: str) -> bytes:
+        job = self.status(job_id, user_id)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for row in self.db.execute(
+                "SELECT path, converted_code FROM job_files WHERE job_id = ? AND status = 'done' ORDER BY path",
+                (job_id,),
+            ):
+                archive.writestr(
+                    output_path(row["path"], job["target_language"]),
+                    row["converted_code"],
+                )
+        return buffer.getvalue()
+
+
+job_manager: JobManager | None = None
+
+
+def start_job_manager() -> None:
+    global job_manager
+    settings = clients.settings
+    job_manager = JobManager(
+        settings.job_db_path,
+        concurrency=settings.job_concurrency,
+        default_token_budget=settings.job_token_budget,
+        lease_seconds=settings.job_lease_seconds,
+    )
+    job_manager.start()
+
+
+async def stop_job_manager() -> None:
+    if job_manager:
+        await job_manager.close()
+
+
+async def _require_user(request: Request) -> AuthResponse:
+    auth_response: AuthResponse = await get_user_info(request)
+    if not auth_response.authenticated:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return auth_response
+
+
+async def handle_job_submission(request: Request) -> dict:
+    auth_response: AuthResponse = await _require_user(request)
+    try:
+        data = await request.json()
+        repo_url = data.get("repo_url")
+        target_language = data.get("target_language")
+
+        if not repo_url or not target_language:
+            raise HTTPException(
+                status_code=400,
+                detail="Missing required fields: repo_url or target_language",
+            )
+
+        token_budget = data.get("token_budget")
+        if token_budget is not None:
+            try:
+                token_budget = int(token_budget)
+            except (TypeError, ValueError):
+                token_budget = 0
+            if token_budget <= 0:
+                raise HTTPException(
+                    status_code=400, detail="token_budget must be a positive integer"
+                )
+
+        job_id = await job_manager.submit(
+            auth_response.user.id,
+            repo_url,
+            target_language,
+            source_language=data.get("source_language") or None,
+            path_filter=data.get("path_filter") or None,
+            token_budget=token_budget,
+        )
+        return job_manager.status(job_id, auth_response.user.id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def handle_job_status(request: Request, job_id: str) -> dict:
+    auth_response: AuthResponse = await _require_user(request)
+    return job_manager.status(job_id, auth_response.user.id)
+
+
+async def handle_job_files(request: Request, job_id: str) -> list[dict]:
+    auth_response: AuthResponse = await _require_user(request)
+    return job_manager.files(job_id, auth_response.user.id)
+
+
+async def handle_job_download(request: Request, job_id: str) -> Response:
+    auth_response: AuthResponse = await _require_user(request)
+    content = job_manager.archive(job_id, auth_response.user.id)
+    return Response(
+        content=content,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.zip"'},
+    )
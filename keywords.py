@@ -0,0 +1,136 @@
+# built-in
+import re
+
+# internal
+from models import SearchParams
+
+
+LANGUAGE_ALIASES: dict[str, str] = {
+    "python": "python",
+    "py": "python",
+    "javascript": "javascript",
+    "js": "javascript",
+    "node": "javascript",
+    "nodejs": "javascript",
+    "typescript": "typescript",
+    "ts": "typescript",
+    "java": "java",
+    "kotlin": "kotlin",
+    "scala": "scala",
+    "c": "c",
+    "c++": "c++",
+    "cpp": "c++",
+    "c#": "c#",
+    "csharp": "c#",
+    "go": "go",
+    "golang": "go",
+    "rust": "rust",
+    "ruby": "ruby",
+    "php": "php",
+    "swift": "swift",
+    "dart": "dart",
+    "haskell": "haskell",
+    "elixir": "elixir",
+    "lua": "lua",
+    "r": "r",
+    "julia": "julia",
+    "shell": "shell",
+    "bash": "shell",
+}
+
+GITHUB_LANGUAGE_NAMES: dict[str, str] = {
+    "python": "Python",
+    "javascript": "JavaScript",
+    "typescript": "TypeScript",
+    "java": "Java",
+    "kotlin": "Kotlin",
+    "scala": "Scala",
+    "c": "C",
+    "c++": "C++",
+    "c#": "C#",
+    "go": "Go",
+    "rust": "Rust",
+    "ruby": "Ruby",
+    "php": "PHP",
+    "swift": "Swift",
+    "dart": "Dart",
+    "haskell": "Haskell",
+    "elixir": "Elixir",
+    "lua": "Lua",
+    "r": "R",
+    "julia": "Julia",
+    "shell": "Shell",
+}
+
+AMBIGUOUS_LANGUAGES: set[str] = {"c", "r", "go", "node", "shell"}
+
+STOPWORDS: set[str] = {
+    "a", "an", "and", "any", "are", "as", "at", "be", "best", "by", "can",
+    "code", "do", "does", "for", "find", "from", "get", "give", "good", "i",
+    "in", "into", "is", "it", "library", "libraries", "like", "looking",
+    "me", "my", "need", "of", "on", "or", "project", "projects", "repo",
+    "repos", "repository", "repositories", "show", "simple", "some", "that",
+    "the", "this", "to", "tool", "tools", "using", "want", "with", "written",
+}
+
+COMPLEX_MARKERS: set[str] = {
+    "how", "why", "what", "which", "when", "where", "who", "not", "without",
+    "except", "but", "instead", "alternative", "alternatives", "vs", "versus",
+    "similar", "compare", "difference",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split()).strip(" ?!.,")
+
+
+def github_language_names(languages: list[str]) -> list[str]:
+    names: list[str] = []
+    for language in languages:
+        key = language.strip().lower()
+        name = GITHUB_LANGUAGE_NAMES.get(LANGUAGE_ALIASES.get(key, key), language.strip())
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def tokenize(query: str) -> list[str]:
+    return [token.rstrip(".-") for token in TOKEN_PATTERN.findall(query.lower())]
+
+
+def local_extract(query: str) -> tuple[SearchParams | None, float]:
+    tokens = tokenize(query)
+    if not tokens:
+        return None, 0.0
+
+    keywords: list[str] = []
+    languages: list[str] = []
+    confidence = 1.0
+
+    for token in tokens:
+        if token in COMPLEX_MARKERS:
+            confidence -= 0.4
+            continue
+        language = LANGUAGE_ALIASES.get(token)
+        if language and (token not in AMBIGUOUS_LANGUAGES or len(tokens) > 1):
+            if language not in languages:
+                languages.append(language)
+            continue
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        if token not in keywords:
+            keywords.append(token)
+
+    if not keywords:
+        return None, 0.0
+
+    if len(keywords) > 3:
+        confidence -= 0.1 * (len(keywords) - 3)
+    if len(tokens) > 8:
+        confidence -= 0.2
+    if any(not token.isalnum() for token in keywords):
+        confidence -= 0.1
+
+    return SearchParams(keywords=keywords, languages=languages), max(confidence, 0.0)
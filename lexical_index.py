@@ -0,0 +1,244 @@
+# built-in
+import asyncio
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+
+# internal
+from file_lock import file_lock, file_version
+from vector_store import matches_filter
+
+
+TOKEN_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+NAME_WEIGHT = 2
+
+
+@dataclass
+class _Checkpoint:
+    changes: dict[str, dict]
+    removed: set[str]
+    dirty: bool
+    disk_version: tuple[int, int] | None
+
+
+def tokenize(text: str) -> list[str]:
+    return [token.lower() for token in TOKEN_PATTERN.findall(text or "")]
+
+
+def document_tokens(metadata: dict) -> list[str]:
+    full_name: str = metadata.get("full_name") or ""
+    name_tokens = tokenize(full_name)
+    name_tokens += tokenize(full_name.rsplit("/", 1)[-1].replace("-", "").replace("_", ""))
+    return (
+        name_tokens * NAME_WEIGHT
+        + tokenize(metadata.get("description") or "")
+        + tokenize(metadata.get("language") or "")
+    )
+
+
+class BM25Index:
+    def __init__(self, path: str | None = None, k1: float = 1.2, b: float = 0.75):
+        self.path: str | None = path
+        self.k1: float = k1
+        self.b: float = b
+        self.documents: dict[str, dict] = {}
+        self.lengths: dict[str, int] = {}
+        self.postings: dict[str, dict[str, int]] = {}
+        self.total_length: int = 0
+        self.dirty: bool = False
+        self.changed: set[str] = set()
+        self.removed: set[str] = set()
+        self.disk_version: tuple[int, int] | None = None
+
+        self.queries: int = 0
+        if path:
+            self.load()
+
+    def _remove(self, document_id: str) -> None:
+        if document_id not in self.documents:
+            return
+        for term in set(document_tokens(self.documents.pop(document_id))):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(document_id, None)
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(document_id)
+
+    def _add(self, document_id: str, metadata: dict) -> None:
+        tokens = document_tokens(metadata)
+        self.documents[document_id] = metadata
+        self.lengths[document_id] = len(tokens)
+        self.total_length += len(tokens)
+
+        frequencies: dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[document_id] = frequency
+
+    def upsert(self, records: list[dict]) -> None:
+        for record in records:
+            document_id = str(record["id"])
+            metadata = dict(record.get("metadata") or {})
+            if self.documents.get(document_id) == metadata:
+                continue
+            self._remove(document_id)
+            self._add(document_id, metadata)
+            self.changed.add(document_id)
+            self.removed.discard(document_id)
+            self.dirty = True
+
+    def delete(self, ids: list[str]) -> None:
+        for document_id in ids:
+            if str(document_id) in self.documents:
+                self._remove(str(document_id))
+                self.removed.add(str(document_id))
+                self.changed.discard(str(document_id))
+                self.dirty = True
+
+    def query(
+        self, text: str, top_k: int = 10, metadata_filter: dict | None = None
+    ) -> list[tuple[str, float]]:
+        self.queries += 1
+        terms = set(tokenize(text))
+        if not terms or not self.documents or top_k <= 0:
+            return []
+
+        count = len(self.documents)
+        average_length = self.total_length / count or 1.0
+        scores: dict[str, float] = {}
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for document_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[document_id] / average_length)
+                scores[document_id] = scores.get(document_id, 0.0) + idf * (
+                    frequency * (self.k1 + 1) / (frequency + norm)
+                )
+
+        candidates = scores.items()
+        if metadata_filter:
+            candidates = [
+                (document_id, score)
+                for document_id, score in candidates
+                if matches_filter(self.documents[document_id], metadata_filter)
+            ]
+        return heapq.nlargest(top_k, candidates, key=lambda item: item[1])
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "documents": len(self.documents),
+            "terms": len(self.postings),
+            "queries": self.queries,
+        }
+
+    def _read(self) -> dict[str, dict]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        for document_id, metadata in self._read().items():
+            self._add(document_id, metadata)
+        self.disk_version = file_version(self.path)
+
+    def _take_checkpoint(self) -> _Checkpoint | None:
+        if not self.dirty and file_version(self.path) in (None, self.disk_version):
+            return None
+        checkpoint = _Checkpoint(
+            {document_id: self.documents[document_id] for document_id in self.changed},
+            self.removed,
+            self.dirty,
+            self.disk_version,
+        )
+        self.changed, self.removed, self.dirty = set(), set(), False
+        return checkpoint
+
+    def _restore(self, checkpoint: _Checkpoint) -> None:
+        self.changed |= set(checkpoint.changes) - self.removed
+        self.removed |= checkpoint.removed - self.changed
+        self.dirty = self.dirty or checkpoint.dirty
+
+    def _save(
+        self, checkpoint: _Checkpoint
+    ) -> tuple["BM25Index | None", tuple[int, int] | None]:
+        directory = os.path.dirname(self.path) or "."
+        with file_lock(f"{self.path}.lock"):
+            outside_write = file_version(self.path) not in (None, checkpoint.disk_version)
+            documents = self._read() if os.path.exists(self.path) else {}
+            for document_id in checkpoint.removed:
+                documents.pop(document_id, None)
+            documents.update(checkpoint.changes)
+            if checkpoint.dirty:
+                with tempfile.NamedTemporaryFile(
+                    "w", dir=directory, suffix=".json", delete=False, encoding="utf-8"
+                ) as f:
+                    json.dump(documents, f)
+                os.replace(f.name, self.path)
+            disk_version = file_version(self.path)
+
+        if not outside_write:
+            return None, disk_version
+        merged = BM25Index(k1=self.k1, b=self.b)
+        for document_id, metadata in documents.items():
+            merged._add(document_id, metadata)
+        return merged, disk_version
+
+    def _adopt(self, result: tuple["BM25Index | None", tuple[int, int] | None]) -> None:
+        merged, disk_version = result
+        if merged is not None:
+            for document_id in self.removed:
+                merged._remove(document_id)
+            for document_id in self.changed:
+                merged._remove(document_id)
+                merged._add(document_id, self.documents[document_id])
+            self.documents = merged.documents
+            self.lengths = merged.lengths
+            self.postings = merged.postings
+            self.total_length = merged.total_length
+        self.disk_version = disk_version
+
+    def persist(self) -> None:
+        checkpoint = self._take_checkpoint() if self.path else None
+        if checkpoint is None:
+            return
+        try:
+            result = self._save(checkpoint)
+        except BaseException:
+            self._restore(checkpoint)
+            raise
+        self._adopt(result)
+
+    async def checkpoint(self) -> None:
+        checkpoint = self._take_checkpoint() if self.path else None
+        if checkpoint is None:
+            return
+        try:
+            result = await asyncio.to_thread(self._save, checkpoint)
+        except BaseException:
+            self._restore(checkpoint)
+            raise
+        self._adopt(result)
+
+
+def reciprocal_rank_fusion(
+    rankings: dict[str, list[str]], k: int = 60
+) -> list[tuple[str, float, list[str]]]:
+    scores: dict[str, float] = {}
+    sources: dict[str, list[str]] = {}
+    for source, ranking in rankings.items():
+        for rank, document_id in enumerate(ranking, start=1):
+            scores[document_id] = scores.get(document_id, 0.0) + 1 / (k + rank)
+            sources.setdefault(document_id, []).append(source)
+    ordered = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(document_id, score, sources[document_id]) for document_id, score in ordered]
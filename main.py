@@ -1,34 +1,154 @@
+# built-in
+import time
+
 # external
-from fastapi import FastAPI, Request, Query, Response, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Request, Query, Response, HTTPException, Depends
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 import uvicorn
 from contextlib import asynccontextmanager
 
 # internal
+import admission
 import clients
-from search import handle_search
+import metrics
+import search as search_service
+import jobs
+from http_cache import ResponseOptimizer
+from static_assets import StaticAssets
+from search import (
+    GITHUB_PAGE_SIZE,
+    VECTOR_PAGE_SIZE,
+    handle_search,
+    keyword_paths,
+    vector_queries,
+)
 from auth import signin, handle_callback, signout, get_user_info
-from favorites import add_favorite, remove_favorite, get_favorites
+from favorites import add_favorite, remove_favorite, get_favorites, get_favorite_ids
 from models import AuthResponse, SearchResult
 from converter import (
     handle_repo_exploration,
+    handle_tree_listing,
     handle_file_fetch,
     handle_repo_conversion,
+    handle_streaming_conversion,
 )
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await clients.setup_clients()
+    await clients.warm_up_clients()
+    search_service.start_index_writer()
+    jobs.start_job_manager()
     yield
+    await jobs.stop_job_manager()
+    await search_service.stop_index_writer()
     await clients.close_clients()
 
 
 app: FastAPI = FastAPI(lifespan=lifespan)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+static_assets: StaticAssets = StaticAssets(directory="static")
+app.mount("/static", static_assets, name="static")
 templates: Jinja2Templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_url"] = static_assets.url
+
+
+async def _release_after(body_iterator, pool: admission.ConcurrencyPool, started: float):
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        pool.release(time.perf_counter() - started)
+
+
+def _search_page_key(q: str, page: int, min_stars: int) -> tuple:
+    return (" ".join(q.split()), page, min_stars)
+
+
+def _cached_search_page(request: Request) -> bytes | None:
+    try:
+        page_key: tuple = _search_page_key(
+            request.query_params.get("q", ""),
+            int(request.query_params.get("page", 1)),
+            int(request.query_params.get("min_stars", 0)),
+        )
+    except ValueError:
+        return None
+    return clients.page_cache.get(page_key)
+
+
+@app.middleware("http")
+async def admit_requests(request: Request, call_next) -> Response:
+    endpoint: str | None = admission.endpoint_class(request.method, request.url.path)
+    if endpoint == "search" and not request.query_params.get("q", "").strip():
+        endpoint = None
+    if endpoint is None or clients.admission is None:
+        return await call_next(request)
+
+    auth_response: AuthResponse = await get_user_info(request)
+    if endpoint == "search" and not auth_response.authenticated:
+        cached: bytes | None = _cached_search_page(request)
+        if cached is not None:
+            return HTMLResponse(cached)
+
+    user: str = admission.client_key(
+        auth_response.user.id if auth_response.authenticated else None,
+        request.client.host if request.client else None,
+    )
+    try:
+        pool: admission.ConcurrencyPool = await clients.admission.acquire(endpoint, user)
+    except admission.Rejected as e:
+        return JSONResponse(
+            {"detail": e.reason},
+            status_code=e.status_code,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    started: float = time.perf_counter()
+    try:
+        response: Response = await call_next(request)
+    except BaseException:
+        pool.release(time.perf_counter() - started)
+        raise
+    response.body_iterator = _release_after(response.body_iterator, pool, started)
+    return response
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next) -> Response:
+    trace: list[tuple[str, float]] = metrics.start_trace()
+    started: float = time.perf_counter()
+    status: int = 500
+    try:
+        response: Response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed: float = time.perf_counter() - started
+        route = request.scope.get("route")
+        route_path: str = route.path if route is not None else "unmatched"
+        metrics.request_latency.observe(
+            request.method, route_path, str(status), value=elapsed
+        )
+        if elapsed >= clients.settings.slow_request_seconds:
+            upstream: str = ", ".join(
+                f"{name}={duration * 1000:.0f}ms" for name, duration in trace
+            )
+            print(
+                f"Slow request {request.method} {route_path} status={status} "
+                f"took {elapsed * 1000:.0f}ms upstream=[{upstream}]"
+            )
+
+    if "x-debug-trace" in request.headers:
+        timing: str = metrics.server_timing(trace + [("total", elapsed)])
+        response.headers["Server-Timing"] = timing
+    return response
 
 
 @app.get("/auth/signin")
@@ -42,64 +162,92 @@ async def auth_callback(request: Request, code: str = Query(None)) -> RedirectRe
 
 
 @app.get("/auth/signout")
-async def auth_signout(response: Response) -> RedirectResponse:
-    return await signout(response)
+async def auth_signout(request: Request) -> RedirectResponse:
+    return await signout(request)
 
 
 @app.get("/auth/user")
-async def auth_get_user(request: Request) -> AuthResponse:
-    return await get_user_info(request)
+async def auth_get_user(
+    auth_response: AuthResponse = Depends(get_user_info),
+) -> AuthResponse:
+    return auth_response
 
 
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request) -> HTMLResponse:
-    auth_response: AuthResponse = await get_user_info(request)
+async def home(
+    request: Request, auth_response: AuthResponse = Depends(get_user_info)
+) -> HTMLResponse:
     return templates.TemplateResponse(
         "index.html", {"request": request, "auth": auth_response}
     )
 
 
 @app.get("/search", response_class=HTMLResponse)
-async def search(request: Request, q: str = Query("")) -> HTMLResponse:
+async def search(
+    request: Request,
+    q: str = Query(""),
+    page: int = Query(1, ge=1, le=50),
+    min_stars: int = Query(0, ge=0),
+    auth_response: AuthResponse = Depends(get_user_info),
+) -> HTMLResponse:
     if not q or q.strip() == "":
         return templates.TemplateResponse("index.html", {"request": request})
 
-    auth_response: AuthResponse = await get_user_info(request)
-    results: SearchResult = await handle_search(request, q)
+    page_key: tuple | None = None
+    if not auth_response.authenticated:
+        page_key = _search_page_key(q, page, min_stars)
+        cached: bytes | None = clients.page_cache.get(page_key)
+        if cached is not None:
+            return HTMLResponse(cached)
 
-    return templates.TemplateResponse(
+    results: SearchResult = await handle_search(request, q, page, min_stars)
+    favorite_ids: set[str] = await get_favorite_ids(auth_response, request)
+
+    response: HTMLResponse = templates.TemplateResponse(
         "results.html",
         {
             "request": request,
             "query": q,
             "auth": auth_response,
+            "favorite_ids": favorite_ids,
             "pinecone_results": results.get("pinecone_results", []),
             "github_results": results.get("github_results", []),
+            "ranked_results": results.get("ranked_results", []),
+            "page": page,
+            "min_stars": min_stars,
+            "has_next": len(results.get("github_results", [])) >= GITHUB_PAGE_SIZE
+            or len(results.get("pinecone_results", [])) >= VECTOR_PAGE_SIZE,
         },
     )
+    if page_key is not None:
+        clients.page_cache.set(page_key, response.body)
+    return response
 
 
-@app.post("/favorites/add")
-async def favorites_add(request: Request) -> dict[str, bool]:
-    return await add_favorite(request)
+@app.post("/favorites/add", dependencies=[Depends(get_user_info)])
+async def favorites_add(request: Request, response: Response) -> dict[str, bool]:
+    return await add_favorite(request, response)
 
 
-@app.delete("/favorites/remove/{repo_id}")
-async def favorites_remove(request: Request, repo_id: str) -> dict[str, bool]:
-    return await remove_favorite(request, repo_id)
+@app.delete("/favorites/remove/{repo_id}", dependencies=[Depends(get_user_info)])
+async def favorites_remove(
+    request: Request, response: Response, repo_id: str
+) -> dict[str, bool]:
+    return await remove_favorite(request, response, repo_id)
 
 
 @app.get("/favorites")
-async def favorites_get(request: Request):
+async def favorites_get(
+    request: Request, auth_response: AuthResponse = Depends(get_user_info)
+):
     repositories = await get_favorites(request)
-    auth_response: AuthResponse = await get_user_info(request)
     return templates.TemplateResponse(
         "favorites.html",
         {"request": request, "favorites": repositories, "auth": auth_response},
     )
 
 
-@app.get("/api/favorites")
+@app.get("/api/favorites", dependencies=[Depends(get_user_info)])
 async def favorites_get_json(request: Request):
     repositories = await get_favorites(request)
     if isinstance(repositories, RedirectResponse):
@@ -108,27 +256,99 @@ async def favorites_get_json(request: Request):
 
 
 @app.get("/repo-convert", response_class=HTMLResponse)
-async def repo_convert_page(request: Request) -> HTMLResponse:
-    auth_response = await get_user_info(request)
+async def repo_convert_page(
+    request: Request, auth_response: AuthResponse = Depends(get_user_info)
+) -> HTMLResponse:
     return templates.TemplateResponse(
         "repo_convert.html", {"request": request, "auth": auth_response}
     )
 
 
-@app.post("/repo-convert/explore")
+@app.post("/repo-convert/explore", dependencies=[Depends(get_user_info)])
 async def repo_explore(request: Request) -> dict:
     return await handle_repo_exploration(request)
 
 
-@app.post("/repo-convert/fetch-file")
+@app.post("/repo-convert/tree", dependencies=[Depends(get_user_info)])
+async def repo_tree(request: Request) -> dict:
+    return await handle_tree_listing(request)
+
+
+@app.post("/repo-convert/fetch-file", dependencies=[Depends(get_user_info)])
 async def fetch_file(request: Request) -> dict:
     return await handle_file_fetch(request)
 
 
-@app.post("/repo-convert/convert")
+@app.post("/repo-convert/convert", dependencies=[Depends(get_user_info)])
 async def repo_convert(request: Request) -> dict:
     return await handle_repo_conversion(request)
 
 
+@app.post("/repo-convert/convert/stream", dependencies=[Depends(get_user_info)])
+async def repo_convert_stream(request: Request) -> StreamingResponse:
+    return await handle_streaming_conversion(request)
+
+
+@app.post("/repo-convert/jobs", dependencies=[Depends(get_user_info)])
+async def repo_convert_job_submit(request: Request) -> dict:
+    return await jobs.handle_job_submission(request)
+
+
+@app.get("/repo-convert/jobs/{job_id}", dependencies=[Depends(get_user_info)])
+async def repo_convert_job_status(request: Request, job_id: str) -> dict:
+    return await jobs.handle_job_status(request, job_id)
+
+
+@app.get("/repo-convert/jobs/{job_id}/files", dependencies=[Depends(get_user_info)])
+async def repo_convert_job_files(request: Request, job_id: str) -> list[dict]:
+    return await jobs.handle_job_files(request, job_id)
+
+
+@app.get("/repo-convert/jobs/{job_id}/download", dependencies=[Depends(get_user_info)])
+async def repo_convert_job_download(request: Request, job_id: str) -> Response:
+    return await jobs.handle_job_download(request, job_id)
+
+
+def component_stats() -> dict:
+    return {
+        "embedding_cache": clients.embedding_cache.stats(),
+        "embedding_batcher": clients.embedding_batcher.stats(),
+        "keyword_paths": keyword_paths,
+        "vector_queries": vector_queries,
+        "keyword_cache": clients.keyword_cache.stats(),
+        "index_writer": search_service.index_writer.stats(),
+        "github": clients.github.stats(),
+        "blob_store": clients.blob_store.stats(),
+        "conversion_cache": clients.conversion_cache.stats(),
+        "http_pools": clients.http_pools.stats(),
+        "lexical_index": clients.lexical_index.stats(),
+        "index_ledger": clients.index_ledger.stats(),
+        "page_cache": clients.page_cache.stats(),
+        "static_assets": static_assets.stats(),
+        "admission": clients.admission.stats() if clients.admission else {},
+        "single_flight": {
+            "search": clients.search_flight.stats(),
+            "tree": clients.tree_flight.stats(),
+            "blob": clients.blob_flight.stats(),
+        },
+    }
+
+
+@app.get("/api/stats")
+async def stats() -> dict:
+    return component_stats()
+
+
+@app.get("/metrics")
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics.render(component_stats()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+app.add_middleware(ResponseOptimizer)
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
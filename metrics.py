@@ -0,0 +1,173 @@
+# built-in
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _label_text(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name: str = name
+        self.description: str = description
+        self.labels: tuple[str, ...] = labels
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for label_values, value in self.values.items():
+            yield f"{self.name}{_label_text(self.labels, label_values)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *label_values: str, value: float) -> None:
+        self.values[label_values] = value
+
+    def dec(self, *label_values: str, amount: float = 1.0) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name: str = name
+        self.description: str = description
+        self.labels: tuple[str, ...] = labels
+        self.buckets: tuple[float, ...] = buckets
+        self.counts: dict[tuple[str, ...], list[int]] = {}
+        self.sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, *label_values: str, value: float) -> None:
+        counts = self.counts.get(label_values)
+        if counts is None:
+            counts = self.counts[label_values] = [0] * (len(self.buckets) + 1)
+            self.sums[label_values] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[label_values] += value
+
+    def samples(self) -> Iterator[str]:
+        for label_values, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _label_text(self.labels, label_values, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            cumulative += counts[-1]
+            labels = _label_text(self.labels, label_values, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _label_text(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {self.sums[label_values]}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+upstream_latency = Histogram(
+    "codesearch_upstream_latency_seconds",
+    "Latency of calls to upstream services.",
+    ("upstream", "operation"),
+)
+upstream_errors = Counter(
+    "codesearch_upstream_errors_total",
+    "Failed calls to upstream services.",
+    ("upstream", "operation"),
+)
+upstream_in_flight = Gauge(
+    "codesearch_upstream_in_flight",
+    "Upstream calls currently in progress.",
+    ("upstream", "operation"),
+)
+request_latency = Histogram(
+    "codesearch_request_latency_seconds",
+    "Latency of HTTP requests by route.",
+    ("method", "route", "status"),
+)
+
+REGISTRY: list[Counter | Histogram] = [
+    upstream_latency,
+    upstream_errors,
+    upstream_in_flight,
+    request_latency,
+]
+
+current_trace: ContextVar[list[tuple[str, float]] | None] = ContextVar(
+    "current_trace", default=None
+)
+
+
+def start_trace() -> list[tuple[str, float]]:
+    trace: list[tuple[str, float]] = []
+    current_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def track(upstream: str, operation: str) -> Iterator[None]:
+    upstream_in_flight.inc(upstream, operation)
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        upstream_errors.inc(upstream, operation)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        upstream_in_flight.dec(upstream, operation)
+        upstream_latency.observe(upstream, operation, value=elapsed)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.append((f"{upstream}.{operation}", elapsed))
+
+
+def server_timing(trace: list[tuple[str, float]]) -> str:
+    return ", ".join(
+        f"{name.replace('.', '-')};dur={elapsed * 1000:.1f}" for name, elapsed in trace
+    )
+
+
+def _flatten(prefix: str, values: dict) -> Iterator[tuple[str, float]]:
+    for key, value in values.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            yield from _flatten(name, value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def render(components: dict[str, dict] | None = None) -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+
+    for component, values in (components or {}).items():
+        for name, value in _flatten(f"codesearch_{component}", values):
+            name = "".join(c if c.isalnum() or c == "_" else "_" for c in name)
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -8,10 +8,82 @@ class Setting(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
     github_token: str
     openai_api_key: str
-    pinecone_api_key: str
-    pinecone_host: str
+    pinecone_api_key: str = ""
+    pinecone_host: str = ""
     supabase_url: str
     supabase_key: str
+    vector_backend: str = "pinecone"
+    local_index_path: str = "data/vector_index"
+    embedding_cache_size: int = 10000
+    embedding_cache_path: str = "data/embeddings.sqlite3"
+    embedding_batch_size: int = 64
+    embedding_batch_window_ms: float = 10.0
+    embedding_dimensions: int = 0
+    vector_quantization: str = "none"
+    keyword_cache_ttl: int = 3600
+    keyword_fast_path_threshold: float = 0.7
+    index_queue_size: int = 1000
+    index_batch_size: int = 50
+    index_batch_window_ms: float = 200.0
+    index_max_retries: int = 3
+    github_cache_size: int = 2048
+    github_cache_bytes: int = 16777216
+    github_rate_limit_reserve: int = 5
+    github_max_wait: float = 30.0
+    supabase_jwt_secret: str = ""
+    supabase_jwks_url: str = ""
+    session_cache_ttl: int = 300
+    favorites_cache_ttl: int = 300
+    ref_cache_ttl: int = 60
+    tree_cache_size: int = 64
+    blob_store_path: str = "data/blobs"
+    blob_memory_bytes: int = 67108864
+    job_db_path: str = "data/jobs.sqlite3"
+    job_concurrency: int = 4
+    job_token_budget: int = 500000
+    job_lease_seconds: float = 60.0
+    conversion_cache_path: str = "data/conversions.sqlite3"
+    conversion_cache_bytes: int = 268435456
+    chunk_threshold_chars: int = 16000
+    chunk_max_chars: int = 12000
+    chunk_concurrency: int = 8
+    slow_request_seconds: float = 2.0
+    github_pool_size: int = 20
+    github_timeout: float = 15.0
+    openai_pool_size: int = 50
+    openai_timeout: float = 120.0
+    http_connect_timeout: float = 5.0
+    http_pool_timeout: float = 10.0
+    http_keepalive_expiry: float = 30.0
+    http2: bool = True
+    http_warmup_connections: int = 2
+    supabase_timeout: float = 10.0
+    pinecone_pool_size: int = 20
+    search_result_ttl: float = 5.0
+    lexical_index_path: str = "data/lexical_index.json"
+    lexical_top_k: int = 10
+    rrf_k: int = 60
+    vector_overfetch: int = 3
+    vector_max_candidates: int = 200
+    star_weight: float = 0.02
+    index_ledger_path: str = "data/index_ledger.sqlite3"
+    index_max_age: float = 604800
+    index_star_change_ratio: float = 0.05
+    index_star_refresh_age: float = 86400
+    index_checkpoint_interval: float = 30.0
+    admission_enabled: bool = True
+    admission_user_rate: float = 1.0
+    admission_user_burst: float = 20.0
+    admission_global_rate: float = 50.0
+    admission_global_burst: float = 200.0
+    admission_queue_size: int = 32
+    admission_max_wait: float = 10.0
+    admission_convert_cost: float = 5.0
+    search_concurrency: int = 16
+    convert_concurrency: int = 4
+    explore_concurrency: int = 16
+    search_page_cache_ttl: float = 60.0
+    search_page_cache_size: int = 1000
 
 
 class Repository(BaseModel):
@@ -23,6 +95,11 @@ class Repository(BaseModel):
     stargazers_count: int
 
 
+class RankedRepository(Repository):
+    score: float
+    sources: list[str]
+
+
 class SearchParams(BaseModel):
     keywords: list[str]
     languages: list[str] = []
@@ -31,6 +108,18 @@ class SearchParams(BaseModel):
 class SearchResult(dict):
     pinecone_results: list[dict]
     github_results: list[Repository]
+    ranked_results: list[RankedRepository]
+
+
+class VectorMatch(BaseModel):
+    id: str
+    score: float
+    metadata: Optional[dict] = None
+
+
+class VectorQueryResponse(BaseModel):
+    matches: list[VectorMatch]
+    namespace: str = ""
 
 
 class PKCEPair(BaseModel):
@@ -0,0 +1,195 @@
+# built-in
+import asyncio
+import fnmatch
+import posixpath
+from functools import partial
+
+# internal
+import clients
+
+
+def parse_repo_url(repo_url: str) -> tuple[str, str]:
+    parts = repo_url.rstrip("/").split("/")
+    if len(parts) < 5 or parts[2] != "github.com":
+        raise ValueError("Invalid GitHub repository URL")
+    repo = parts[4]
+    if repo.endswith(".git"):
+        repo = repo[:-4]
+    return parts[3], repo
+
+
+def _entry(item: dict, parent: str) -> dict:
+    path = posixpath.join(parent, item["path"]) if parent else item["path"]
+    return {
+        "path": path,
+        "name": posixpath.basename(path),
+        "type": "tree" if item.get("type") == "tree" else "blob",
+        "sha": item.get("sha"),
+        "size": item.get("size"),
+    }
+
+
+class RepoTree:
+    def __init__(self, owner: str, repo: str, sha: str):
+        self.owner: str = owner
+        self.repo: str = repo
+        self.sha: str = sha
+        self.truncated: bool = False
+        self.children: dict[str, list[dict]] = {}
+        self.tree_shas: dict[str, str] = {"": sha}
+        self.lock: asyncio.Lock = asyncio.Lock()
+
+    def _add(self, directory: str, entries: list[dict]) -> None:
+        self.children[directory] = entries
+        for entry in entries:
+            if entry["type"] == "tree":
+                self.tree_shas[entry["path"]] = entry["sha"]
+
+    async def _fetch(self, tree_sha: str, recursive: bool) -> dict:
+        response = await clients.github.get(
+            f"/repos/{self.owner}/{self.repo}/git/trees/{tree_sha}",
+            params={"recursive": 1} if recursive else None,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def load(self) -> None:
+        tree_data = await self._fetch(self.sha, recursive=True)
+        if tree_data.get("truncated"):
+            self.truncated = True
+            await self._ensure("")
+            return
+
+        grouped: dict[str, list[dict]] = {"": []}
+        for item in tree_data.get("tree", []):
+            entry = _entry(item, "")
+            grouped.setdefault(posixpath.dirname(entry["path"]), []).append(entry)
+            if entry["type"] == "tree":
+                grouped.setdefault(entry["path"], [])
+        for directory, entries in grouped.items():
+            self._add(directory, entries)
+
+    async def _ensure(self, directory: str) -> None:
+        if directory in self.children:
+            return
+
+        tree_sha = self.tree_shas.get(directory)
+        if tree_sha is None and directory:
+            await self._ensure(posixpath.dirname(directory))
+            tree_sha = self.tree_shas.get(directory)
+        if tree_sha is None:
+            raise ValueError(f"Unknown directory: {directory}")
+
+        tree_data = await self._fetch(tree_sha, recursive=False)
+        self._add(
+            directory,
+            [_entry(item, directory) for item in tree_data.get("tree", [])],
+        )
+
+    async def directory(self, directory: str) -> list[dict]:
+        directory = directory.strip("/")
+        if directory not in self.children:
+            async with self.lock:
+                await self._ensure(directory)
+        return self.children[directory]
+
+    async def find(self, path: str) -> dict:
+        path = path.strip("/")
+        for entry in await self.directory(posixpath.dirname(path)):
+            if entry["path"] == path:
+                return entry
+        raise ValueError(f"File not found in repository: {path}")
+
+    async def walk(self, directory: str = "") -> list[dict]:
+        blobs: list[dict] = []
+        pending: list[str] = [directory.strip("/")]
+        while pending:
+            current = pending.pop()
+            for entry in await self.directory(current):
+                if entry["type"] == "tree":
+                    pending.append(entry["path"])
+                else:
+                    blobs.append(entry)
+        return blobs
+
+    async def listing(
+        self,
+        directory: str = "",
+        page: int = 1,
+        per_page: int = 200,
+        pattern: str | None = None,
+    ) -> dict:
+        if pattern:
+            entries = [
+                entry
+                for entry in await self.walk(directory)
+                if fnmatch.fnmatch(entry["path"], pattern)
+                or fnmatch.fnmatch(entry["name"], pattern)
+            ]
+            entries.sort(key=lambda entry: entry["path"])
+        else:
+            entries = sorted(
+                await self.directory(directory),
+                key=lambda entry: (entry["type"] != "tree", entry["name"].lower()),
+            )
+
+        page = max(page, 1)
+        per_page = max(1, min(per_page, 1000))
+        start = (page - 1) * per_page
+        return {
+            "sha": self.sha,
+            "path": directory.strip("/"),
+            "entries": entries[start : start + per_page],
+            "page": page,
+            "per_page": per_page,
+            "total": len(entries),
+            "truncated": self.truncated,
+        }
+
+
+async def resolve_commit(owner: str, repo: str, ref: str | None = None) -> str:
+    cache_key = (owner, repo, ref)
+    sha: str | None = clients.ref_cache.get(cache_key)
+    if sha is not None:
+        return sha
+    return await clients.tree_flight.do(
+        ("ref",) + cache_key, partial(_resolve_new_commit, owner, repo, ref)
+    )
+
+
+async def _resolve_new_commit(owner: str, repo: str, ref: str | None) -> str:
+    cache_key = (owner, repo, ref)
+
+    if not ref:
+        response = await clients.github.get(f"/repos/{owner}/{repo}")
+        response.raise_for_status()
+        ref = response.json().get("default_branch", "main")
+
+    response = await clients.github.get(
+        f"/repos/{owner}/{repo}/commits/{ref}", accept="application/vnd.github.sha"
+    )
+    response.raise_for_status()
+    sha = response.text.strip()
+
+    clients.ref_cache.set(cache_key, sha)
+    return sha
+
+
+async def load_tree(repo_url: str, ref: str | None = None) -> RepoTree:
+    owner, repo = parse_repo_url(repo_url)
+    sha = await resolve_commit(owner, repo, ref)
+
+    cache_key = (owner, repo, sha)
+    tree: RepoTree | None = clients.tree_cache.get(cache_key)
+    if tree is None:
+        tree = await clients.tree_flight.do(
+            cache_key, partial(_load_new_tree, owner, repo, sha)
+        )
+    return tree
+
+
+async def _load_new_tree(owner: str, repo: str, sha: str) -> RepoTree:
+    tree = RepoTree(owner, repo, sha)
+    await tree.load()
+    clients.tree_cache.set((owner, repo, sha), tree)
+    return tree
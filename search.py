@@ -1,43 +1,203 @@
 # built-in
 import json
 import asyncio
+import math
+from functools import partial
 
 # external
 import httpx
 from fastapi import HTTPException, Request
-from pinecone import QueryResponse
 
 # internal
-from models import SearchParams, Repository, SearchResult
+from models import (
+    SearchParams,
+    Repository,
+    RankedRepository,
+    SearchResult,
+    VectorMatch,
+    VectorQueryResponse,
+)
+from embedding_cache import normalize_text
+from keywords import github_language_names, local_extract, normalize_query
+from indexer import IndexWriter
+from lexical_index import reciprocal_rank_fusion
+from metrics import track
+from vector_store import LocalVectorIndex
 import clients
 
 
-async def handle_search(request: Request, q: str = "") -> SearchResult:
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+VECTOR_PAGE_SIZE = 5
+GITHUB_PAGE_SIZE = 10
+STAR_BOOST_CAP = 1000000
+
+keyword_paths: dict[str, int] = {"cache": 0, "local": 0, "llm": 0}
+vector_queries: dict[str, int] = {"queries": 0, "filtered": 0, "refetches": 0}
+
+index_writer: IndexWriter | None = None
+checkpoint_task: asyncio.Task | None = None
+
+
+def start_index_writer() -> None:
+    global index_writer, checkpoint_task
+    settings = clients.settings
+    index_writer = IndexWriter(
+        parallel_upsert,
+        max_queue=settings.index_queue_size,
+        batch_size=settings.index_batch_size,
+        window_ms=settings.index_batch_window_ms,
+        max_retries=settings.index_max_retries,
+    )
+    index_writer.start()
+    checkpoint_task = asyncio.create_task(
+        _checkpoint_loop(settings.index_checkpoint_interval)
+    )
+
+
+async def stop_index_writer() -> None:
+    if index_writer:
+        await index_writer.close()
+    if checkpoint_task:
+        checkpoint_task.cancel()
+        try:
+            await checkpoint_task
+        except asyncio.CancelledError:
+            pass
+
+
+async def handle_search(
+    request: Request, q: str = "", page: int = 1, min_stars: int = 0
+) -> SearchResult:
+    return await clients.search_flight.do(
+        (normalize_query(q), page, min_stars),
+        partial(run_search, q, page, min_stars),
+    )
+
+
+async def _filtered_vector_search(
+    q: str,
+    embedding_task: asyncio.Task,
+    search_params: SearchParams,
+    page: int,
+    min_stars: int,
+) -> VectorQueryResponse:
+    return await search_pinecone(
+        q,
+        top_k=VECTOR_PAGE_SIZE,
+        languages=search_params.languages,
+        min_stars=min_stars,
+        page=page,
+        query_vector=await embedding_task,
+    )
+
+
+def search_lexical(
+    q: str, search_params: SearchParams, page: int = 1, min_stars: int = 0
+) -> list[tuple[str, float]]:
+    top_k: int = clients.settings.lexical_top_k
+    hits = clients.lexical_index.query(
+        " ".join([q] + search_params.keywords),
+        top_k=top_k * page,
+        metadata_filter=vector_filter(search_params.languages, min_stars),
+    )
+    return hits[top_k * (page - 1) :]
+
+
+async def run_search(q: str, page: int = 1, min_stars: int = 0) -> SearchResult:
+    embedding_task: asyncio.Task = asyncio.create_task(embed_text(q))
+    vector_task: asyncio.Task | None = None
     try:
         search_params: SearchParams = await extract_keywords(q)
+        vector_task = asyncio.create_task(
+            _filtered_vector_search(q, embedding_task, search_params, page, min_stars)
+        )
+        github_results: list[Repository] = await search_github(
+            search_params, limit=GITHUB_PAGE_SIZE, page=page, min_stars=min_stars
+        )
+        index_writer.enqueue(github_results)
+        lexical_results: list[tuple[str, float]] = search_lexical(
+            q, search_params, page, min_stars
+        )
 
-        github_results: list[Repository] = await search_github(search_params, limit=10)
-        await parallel_upsert(github_results)
-        pinecone_results: QueryResponse = await search_pinecone(q, top_k=5)
+        pinecone_results: VectorQueryResponse = await vector_task
         results: SearchResult = SearchResult(
             pinecone_results=pinecone_results.matches,
             github_results=github_results,
+            ranked_results=rank_results(
+                pinecone_results.matches, lexical_results, github_results
+            ),
         )
         return results
     except Exception as e:
+        embedding_task.cancel()
+        if vector_task is not None:
+            vector_task.cancel()
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _repository_from_metadata(repo_id: str, metadata: dict | None) -> Repository:
+    metadata = metadata or {}
+    full_name: str = metadata.get("full_name") or repo_id
+    return Repository(
+        id=repo_id,
+        full_name=full_name,
+        html_url=metadata.get("url") or f"https://github.com/{full_name}",
+        description=metadata.get("description") or full_name,
+        language=metadata.get("language") or "Unknown",
+        stargazers_count=int(metadata.get("stars") or 0),
+    )
+
+
+def rank_results(
+    vector_matches: list,
+    lexical_results: list[tuple[str, float]],
+    github_results: list[Repository],
+) -> list[RankedRepository]:
+    repositories: dict[str, Repository] = {repo.id: repo for repo in github_results}
+    for match in vector_matches:
+        repositories.setdefault(
+            str(match.id), _repository_from_metadata(str(match.id), match.metadata)
+        )
+    for repo_id, _ in lexical_results:
+        repositories.setdefault(
+            repo_id,
+            _repository_from_metadata(repo_id, clients.lexical_index.documents.get(repo_id)),
+        )
+
+    fused = reciprocal_rank_fusion(
+        {
+            "vector": [str(match.id) for match in vector_matches],
+            "lexical": [repo_id for repo_id, _ in lexical_results],
+            "github": [repo.id for repo in github_results],
+        },
+        k=clients.settings.rrf_k,
+    )
+    return [
+        RankedRepository(
+            **repositories[repo_id].model_dump(), score=score, sources=sources
+        )
+        for repo_id, score, sources in fused
+    ]
+
+
 async def embed_text(text: str) -> list[float]:
     if not text:
         raise ValueError("Cannot embed empty text")
 
-    text: str = text.replace("\n", " ")
+    text: str = normalize_text(text)
+    dimensions: int | None = clients.settings.embedding_dimensions or None
+    cache_model: str = f"{EMBEDDING_MODEL}:{dimensions}" if dimensions else EMBEDDING_MODEL
+    cached: list[float] | None = clients.embedding_cache.get(cache_model, text)
+    if cached is not None:
+        return cached
+
     try:
-        response = await clients.openai_client.embeddings.create(
-            input=text, model="text-embedding-3-small"
+        embedding: list[float] = await clients.embedding_batcher.embed(
+            text, EMBEDDING_MODEL, dimensions
         )
-        return response.data[0].embedding
+        clients.embedding_cache.set(cache_model, text, embedding)
+        return embedding
     except Exception as e:
         print(f"Error embedding text: {e}")
         raise RuntimeError(f"Failed to generate embedding: {str(e)}")
@@ -47,41 +207,61 @@ async def extract_keywords(nl_query: str) -> SearchParams:
     if not nl_query or nl_query.strip() == "":
         raise ValueError("Empty search query")
 
+    cache_key: str = normalize_query(nl_query)
+    cached: SearchParams | None = clients.keyword_cache.get(cache_key)
+    if cached is not None:
+        keyword_paths["cache"] += 1
+        return cached
+
+    search_params, confidence = local_extract(nl_query)
+    threshold: float = clients.settings.keyword_fast_path_threshold
+    if search_params is not None and confidence >= threshold:
+        keyword_paths["local"] += 1
+    else:
+        search_params = await extract_keywords_llm(nl_query)
+        keyword_paths["llm"] += 1
+
+    clients.keyword_cache.set(cache_key, search_params)
+    return search_params
+
+
+async def extract_keywords_llm(nl_query: str) -> SearchParams:
     try:
-        response = await clients.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Extract search parameters from this query about code. Return a JSON with 'keywords' and 'languages'.",
-                },
-                {"role": "user", "content": nl_query},
-            ],
-            tools=[
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "extract_params",
-                        "description": "Extract search parameters",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "keywords": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                },
-                                "languages": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
+        with track("openai", "chat.keywords"):
+            response = await clients.openai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "Extract search parameters from this query about code. Return a JSON with 'keywords' and 'languages'.",
+                    },
+                    {"role": "user", "content": nl_query},
+                ],
+                tools=[
+                    {
+                        "type": "function",
+                        "function": {
+                            "name": "extract_params",
+                            "description": "Extract search parameters",
+                            "parameters": {
+                                "type": "object",
+                                "properties": {
+                                    "keywords": {
+                                        "type": "array",
+                                        "items": {"type": "string"},
+                                    },
+                                    "languages": {
+                                        "type": "array",
+                                        "items": {"type": "string"},
+                                    },
                                 },
+                                "required": ["keywords", "languages"],
                             },
-                            "required": ["keywords", "languages"],
                         },
-                    },
-                }
-            ],
-            tool_choice={"type": "function", "function": {"name": "extract_params"}},
-        )
+                    }
+                ],
+                tool_choice={"type": "function", "function": {"name": "extract_params"}},
+            )
 
         args = json.loads(response.choices[0].message.tool_calls[0].function.arguments)
         keywords: list[str] = args.get("keywords")
@@ -97,34 +277,28 @@ async def extract_keywords(nl_query: str) -> SearchParams:
 
 
 async def search_github(
-    search_params: SearchParams, limit: int = 10
+    search_params: SearchParams, limit: int = 10, page: int = 1, min_stars: int = 0
 ) -> list[Repository]:
     if not search_params.keywords:
         raise ValueError("No search keywords provided")
 
-    token: str = clients.github_token
-    base_url: str = "https://api.github.com/search/repositories"
-    headers: dict[str, str] = {
-        "Accept": "application/vnd.github.v3+json",
-        "Authorization": f"token {token}",
-    }
-
     query: str = " ".join(search_params.keywords)
     if search_params.languages:
         for lang in search_params.languages:
             query += f" language:{lang}"
+    if min_stars > 0:
+        query += f" stars:>={min_stars}"
 
     params: dict[str, str | int] = {
         "q": query,
         "sort": "stars",
         "order": "desc",
         "per_page": limit,
+        "page": page,
     }
 
     try:
-        response = await clients.http_client.get(
-            base_url, headers=headers, params=params
-        )
+        response = await clients.github.get("/search/repositories", params=params)
         response.raise_for_status()
 
         repo_data: list[dict] = response.json().get("items", [])
@@ -150,51 +324,192 @@ async def search_github(
         raise RuntimeError(f"Failed to search GitHub: {str(e)}")
 
 
-async def search_pinecone(query_text: str, top_k: int = 3):
+def vector_filter(languages: list[str], min_stars: int = 0) -> dict | None:
+    metadata_filter: dict = {}
+    if languages:
+        metadata_filter["language"] = {"$in": github_language_names(languages)}
+    if min_stars > 0:
+        metadata_filter["stars"] = {"$gte": min_stars}
+    return metadata_filter or None
+
+
+def star_boost(stars: float) -> float:
+    stars = min(max(stars, 0), STAR_BOOST_CAP)
+    return clients.settings.star_weight * math.log10(1 + stars)
+
+
+def rerank_matches(matches: list) -> list[VectorMatch]:
+    ranked: list[VectorMatch] = [
+        VectorMatch(
+            id=str(match.id),
+            score=match.score + star_boost((match.metadata or {}).get("stars") or 0),
+            metadata=match.metadata,
+        )
+        for match in matches
+    ]
+    ranked.sort(key=lambda match: match.score, reverse=True)
+    return ranked
+
+
+async def search_pinecone(
+    query_text: str,
+    top_k: int = 3,
+    languages: list[str] | None = None,
+    min_stars: int = 0,
+    page: int = 1,
+    query_vector: list[float] | None = None,
+) -> VectorQueryResponse:
     if not query_text:
         raise ValueError("Empty search query for Pinecone")
 
     try:
-        query_vector: list[float] = await embed_text(query_text)
-        response = await clients.pinecone_index.query(
-            vector=query_vector, top_k=top_k, namespace="", include_metadata=True
+        if query_vector is None:
+            query_vector = await embed_text(query_text)
+
+        settings = clients.settings
+        metadata_filter: dict | None = vector_filter(languages or [], min_stars)
+        needed: int = top_k * page
+        fetch_k: int = max(
+            min(needed * settings.vector_overfetch, settings.vector_max_candidates),
+            needed,
         )
-        return response
+        if isinstance(clients.pinecone_index, LocalVectorIndex):
+            fetch_k = max(settings.vector_max_candidates, needed)
+        max_boost: float = star_boost(STAR_BOOST_CAP)
+
+        vector_queries["queries"] += 1
+        if metadata_filter:
+            vector_queries["filtered"] += 1
+
+        while True:
+            with track("vector", "query"):
+                response = await clients.pinecone_index.query(
+                    vector=query_vector,
+                    top_k=fetch_k,
+                    namespace="",
+                    include_metadata=True,
+                    filter=metadata_filter,
+                )
+            ranked: list[VectorMatch] = rerank_matches(response.matches)
+
+            if len(response.matches) < fetch_k or fetch_k >= settings.vector_max_candidates:
+                break
+            lowest_similarity: float = min(match.score for match in response.matches)
+            if (
+                len(ranked) >= needed
+                and ranked[needed - 1].score >= lowest_similarity + max_boost
+            ):
+                break
+            fetch_k = min(fetch_k * 2, settings.vector_max_candidates)
+            vector_queries["refetches"] += 1
+
+        return VectorQueryResponse(matches=ranked[needed - top_k : needed], namespace="")
     except Exception as e:
         print(f"Pinecone search error: {e}")
         raise RuntimeError(f"Failed to search Pinecone: {str(e)}")
 
 
-async def parallel_upsert(repositories: list[Repository]) -> None:
-    if not repositories:
-        return
+def embedding_version() -> str:
+    return f"{EMBEDDING_MODEL}:{clients.settings.embedding_dimensions or 'default'}"
 
-    try:
-        embedding_tasks = [embed_text(repo.description) for repo in repositories]
-        embeddings: list[list[float] | Exception] = await asyncio.gather(
-            *embedding_tasks, return_exceptions=True
+
+def _record_metadata(repo: Repository) -> dict:
+    return {
+        "full_name": repo.full_name,
+        "url": repo.html_url,
+        "description": repo.description,
+        "language": repo.language,
+        "stars": repo.stargazers_count,
+    }
+
+
+async def _write_vectors(repositories: list[Repository], version: str) -> list[str]:
+    embedding_tasks = [embed_text(repo.description) for repo in repositories]
+    embeddings: list[list[float] | Exception] = await asyncio.gather(
+        *embedding_tasks, return_exceptions=True
+    )
+    pinecone_records = []
+    written: list[Repository] = []
+    for i, embedding in enumerate(embeddings):
+        if isinstance(embedding, Exception):
+            continue
+
+        repo: Repository = repositories[i]
+        written.append(repo)
+        pinecone_records.append(
+            {
+                "id": repo.id,
+                "values": embedding,
+                "metadata": _record_metadata(repo),
+            }
         )
-        pinecone_records = []
-        for i, embedding in enumerate(embeddings):
-            if isinstance(embedding, Exception):
-                continue
-
-            repo: Repository = repositories[i]
-            pinecone_records.append(
-                {
-                    "id": repo.id,
-                    "values": embedding,
-                    "metadata": {
-                        "full_name": repo.full_name,
-                        "url": repo.html_url,
-                        "description": repo.description,
-                        "language": repo.language,
-                        "stars": repo.stargazers_count,
-                    },
-                }
-            )
 
+    if not pinecone_records:
+        return []
+    with track("vector", "upsert"):
         await clients.pinecone_index.upsert(vectors=pinecone_records)
+    clients.lexical_index.upsert(pinecone_records)
+    clients.index_ledger.stage_indexed(written, version)
+    return [repo.id for repo in written]
+
+
+async def _update_stars(repositories: list[Repository]) -> None:
+    with track("vector", "update"):
+        await asyncio.gather(
+            *(
+                clients.pinecone_index.update(
+                    id=repo.id, set_metadata={"stars": repo.stargazers_count}
+                )
+                for repo in repositories
+            )
+        )
+    clients.lexical_index.upsert(
+        [{"id": repo.id, "metadata": _record_metadata(repo)} for repo in repositories]
+    )
+    clients.index_ledger.stage_stars(repositories)
+
+
+async def parallel_upsert(repositories: list[Repository]) -> list[str]:
+    if not repositories:
+        return []
+
+    try:
+        version: str = embedding_version()
+        groups: dict[str, list[Repository]] = clients.index_ledger.classify(
+            repositories, version
+        )
+        indexed: list[str] = [repo.id for repo in groups["fresh"]]
+        to_embed: list[Repository] = groups["new"] + groups["changed"] + groups["stale"]
+        if to_embed:
+            indexed += await _write_vectors(to_embed, version)
+        if groups["stars"]:
+            await _update_stars(groups["stars"])
+            indexed += [repo.id for repo in groups["stars"]]
+        return indexed
     except Exception as e:
         print(f"Error in parallel upsert: {e}")
         raise RuntimeError(f"Failed to upsert data to Pinecone: {str(e)}")
+
+
+def checkpoint_indexes() -> None:
+    if isinstance(clients.pinecone_index, LocalVectorIndex):
+        clients.pinecone_index.persist()
+    clients.lexical_index.persist()
+    clients.index_ledger.flush()
+
+
+async def _checkpoint_indexes() -> None:
+    staged = clients.index_ledger.staged()
+    if isinstance(clients.pinecone_index, LocalVectorIndex):
+        await clients.pinecone_index.checkpoint()
+    await clients.lexical_index.checkpoint()
+    clients.index_ledger.flush(staged)
+
+
+async def _checkpoint_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await _checkpoint_indexes()
+        except Exception as e:
+            print(f"Error checkpointing indexes: {e}")
@@ -0,0 +1,156 @@
+# built-in
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable
+
+# internal
+from cache import TTLCache
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task: asyncio.Task = task
+        self.waiters: int = 0
+
+
+class SingleFlight:
+    def __init__(self, ttl: float = 0.0, max_entries: int = 1024):
+        self.results: TTLCache | None = (
+            TTLCache(ttl=ttl, max_entries=max_entries) if ttl > 0 else None
+        )
+        self.in_flight: dict[Hashable, _Flight] = {}
+
+        self.calls: int = 0
+        self.executions: int = 0
+        self.coalesced: int = 0
+        self.result_hits: int = 0
+
+    async def _execute(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        self.executions += 1
+        try:
+            value = await factory()
+            if self.results is not None and value is not None:
+                self.results.set(key, value)
+            return value
+        finally:
+            flight = self.in_flight.get(key)
+            if flight is not None and flight.task is asyncio.current_task():
+                del self.in_flight[key]
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        if self.results is not None:
+            cached = self.results.get(key)
+            if cached is not None:
+                self.result_hits += 1
+                return cached
+
+        flight = self.in_flight.get(key)
+        if flight is None:
+            task = asyncio.create_task(self._execute(key, factory))
+            task.add_done_callback(
+                lambda done: done.cancelled() or done.exception()
+            )
+            flight = self.in_flight[key] = _Flight(task)
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                if self.in_flight.get(key) is flight:
+                    del self.in_flight[key]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "result_hits": self.result_hits,
+            "in_flight": len(self.in_flight),
+        }
+
+
+class _Broadcast:
+    def __init__(self):
+        self.chunks: list[Any] = []
+        self.finished: bool = False
+        self.error: BaseException | None = None
+        self.updated: asyncio.Event = asyncio.Event()
+        self.subscribers: int = 0
+        self.task: asyncio.Task | None = None
+
+    def publish(self) -> None:
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+
+class StreamFlight:
+    def __init__(self):
+        self.in_flight: dict[Hashable, _Broadcast] = {}
+
+        self.calls: int = 0
+        self.executions: int = 0
+        self.coalesced: int = 0
+
+    async def _execute(
+        self,
+        key: Hashable,
+        broadcast: _Broadcast,
+        factory: Callable[[], AsyncIterator[Any]],
+    ) -> None:
+        self.executions += 1
+        try:
+            async for chunk in factory():
+                broadcast.chunks.append(chunk)
+                broadcast.publish()
+        except BaseException as e:
+            broadcast.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            broadcast.finished = True
+            broadcast.publish()
+            if self.in_flight.get(key) is broadcast:
+                del self.in_flight[key]
+
+    async def stream(
+        self, key: Hashable, factory: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        self.calls += 1
+        broadcast = self.in_flight.get(key)
+        if broadcast is None:
+            broadcast = self.in_flight[key] = _Broadcast()
+            broadcast.task = asyncio.create_task(self._execute(key, broadcast, factory))
+        else:
+            self.coalesced += 1
+
+        broadcast.subscribers += 1
+        position = 0
+        try:
+            while True:
+                while position < len(broadcast.chunks):
+                    yield broadcast.chunks[position]
+                    position += 1
+                if broadcast.finished:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+                await broadcast.updated.wait()
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.finished:
+                broadcast.task.cancel()
+                if self.in_flight.get(key) is broadcast:
+                    del self.in_flight[key]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight),
+        }
@@ -2,10 +2,7 @@ function setupFavoriteButtons() {
   document.querySelectorAll('.favorite-btn').forEach(btn => {
     btn.addEventListener('click', async () => {
       try {
-        const authResponse = await fetch('/auth/user');
-        const authData = await authResponse.json();
-
-        if (!authData.authenticated) {
+        if (document.body.dataset.authenticated !== 'true') {
           window.location.href = '/auth/signin';
           return;
         }
@@ -15,9 +12,10 @@ function setupFavoriteButtons() {
 
         if (btn.classList.contains('active')) {
           await fetch(`/favorites/remove/${repoId}`, { method: 'DELETE' });
-          btn.classList.remove('active');
+          document.querySelectorAll(`.favorite-btn[data-repo-id="${repoId}"]`)
+            .forEach(other => other.classList.remove('active'));
         } else {
-          await fetch('/favorites/add', {
+          const response = await fetch('/favorites/add', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
@@ -25,7 +23,12 @@ function setupFavoriteButtons() {
               repo_data: repoData
             })
           });
-          btn.classList.add('active');
+          if (response.status === 401) {
+            window.location.href = '/auth/signin';
+            return;
+          }
+          document.querySelectorAll(`.favorite-btn[data-repo-id="${repoId}"]`)
+            .forEach(other => other.classList.add('active'));
         }
       } catch (error) {
         console.error("Error handling favorite:", error);
@@ -34,31 +37,8 @@ function setupFavoriteButtons() {
   });
 }
 
-async function markExistingFavorites() {
-  try {
-    const authResponse = await fetch('/auth/user');
-    const authData = await authResponse.json();
-    if (!authData.authenticated) return;
-
-    const response = await fetch('/api/favorites');
-    if (!response.ok) return;
-
-    const favorites = await response.json();
-    const favoriteIds = favorites.map(fav => fav.id);
-
-    document.querySelectorAll('.favorite-btn').forEach(btn => {
-      if (favoriteIds.includes(btn.dataset.repoId)) {
-        btn.classList.add('active');
-      }
-    });
-  } catch (error) {
-    console.error("Error loading favorites:", error);
-  }
-}
-
 document.addEventListener('DOMContentLoaded', () => {
   if (document.querySelectorAll('.favorite-btn').length > 0) {
     setupFavoriteButtons();
-    markExistingFavorites();
   }
-});
\ No newline at end of file
+});
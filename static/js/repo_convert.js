@@ -4,13 +4,20 @@ document.addEventListener('DOMContentLoaded', () => {
     const fileList = document.getElementById('file-list');
     const sourceCode = document.getElementById('source-code');
     const convertedCode = document.getElementById('converted-code');
+    const conversionError = document.getElementById('conversion-error');
     const targetLanguage = document.getElementById('target-language');
     const convertBtn = document.getElementById('convert-btn');
     const loading = document.getElementById('loading');
     const sourceLanguageDisplay = document.getElementById('source-language-display');
     const targetLanguageDisplay = document.getElementById('target-language-display');
+    const fileFilter = document.getElementById('file-filter');
+    const fileBreadcrumbs = document.getElementById('file-breadcrumbs');
+    const fileMore = document.getElementById('file-more');
 
     let currentRepo = '';
+    let currentSha = '';
+    let currentPath = '';
+    let currentPage = 1;
     let currentFile = '';
     let currentLanguage = '';
 
@@ -23,11 +30,23 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    fileFilter.addEventListener('keypress', async (e) => {
+        if (e.key === 'Enter' && currentRepo) {
+            e.preventDefault();
+            await loadDirectory(currentPath, 1);
+        }
+    });
+
+    fileMore.addEventListener('click', async () => {
+        await loadDirectory(currentPath, currentPage + 1);
+    });
+
     async function exploreRepository() {
         const repoUrlValue = repoUrl.value.trim();
         showLoading('Exploring repository...');
         sourceCode.value = '';
         convertedCode.value = '';
+        fileFilter.value = '';
 
         try {
             const response = await fetch('/repo-convert/explore', {
@@ -38,24 +57,89 @@ document.addEventListener('DOMContentLoaded', () => {
 
             const data = await response.json();
             currentRepo = data.repo_url;
-            renderFileList(data.files);
+            currentSha = data.sha;
+            renderListing(data);
         } finally {
             hideLoading();
         }
     }
 
-    function renderFileList(files) {
-        if (!files || files.length === 0) {
+    async function loadDirectory(path, page) {
+        showLoading('Loading files...');
+
+        try {
+            const response = await fetch('/repo-convert/tree', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({
+                    repo_url: currentRepo,
+                    sha: currentSha,
+                    path: path,
+                    page: page,
+                    pattern: fileFilter.value.trim(),
+                }),
+            });
+
+            const data = await response.json();
+            renderListing(data);
+        } finally {
+            hideLoading();
+        }
+    }
+
+    function renderBreadcrumbs(path) {
+        const parts = path ? path.split('/') : [];
+        const crumbs = [`<span class="crumb cursor-pointer text-blue-500" data-path="">/</span>`];
+        parts.forEach((part, index) => {
+            const crumbPath = parts.slice(0, index + 1).join('/');
+            crumbs.push(`<span class="crumb cursor-pointer text-blue-500" data-path="${crumbPath}">${part}</span>`);
+        });
+        fileBreadcrumbs.innerHTML = crumbs.join(' / ');
+
+        fileBreadcrumbs.querySelectorAll('.crumb').forEach(crumb => {
+            crumb.addEventListener('click', async () => {
+                await loadDirectory(crumb.getAttribute('data-path'), 1);
+            });
+        });
+    }
+
+    function renderListing(data) {
+        const entries = data.entries || [];
+        currentPath = data.path || '';
+        currentPage = data.page || 1;
+        renderBreadcrumbs(currentPath);
+        fileMore.classList.toggle('hidden', currentPage * data.per_page >= data.total);
+
+        if (entries.length === 0 && currentPage === 1) {
             fileList.innerHTML = '<p class="text-gray-500">No files found</p>';
             return;
         }
 
-        files.sort((a, b) => a.path.localeCompare(b.path));
-        fileList.innerHTML = files.map(file => {
-            return `<div class="file-item py-1 px-2 hover:bg-gray-100 cursor-pointer" data-path="${file.path}">${file.path}</div>`;
+        const showFullPath = fileFilter.value.trim() !== '';
+        const html = entries.map(entry => {
+            const label = showFullPath ? entry.path : entry.name;
+            if (entry.type === 'tree') {
+                return `<div class="dir-item py-1 px-2 hover:bg-gray-100 cursor-pointer font-medium" data-path="${entry.path}">${label}/</div>`;
+            }
+            return `<div class="file-item py-1 px-2 hover:bg-gray-100 cursor-pointer" data-path="${entry.path}">${label}</div>`;
         }).join('');
 
-        document.querySelectorAll('.file-item').forEach(item => {
+        if (currentPage === 1) {
+            fileList.innerHTML = html;
+        } else {
+            fileList.insertAdjacentHTML('beforeend', html);
+        }
+
+        fileList.querySelectorAll('.dir-item:not([data-bound])').forEach(item => {
+            item.setAttribute('data-bound', 'true');
+            item.addEventListener('click', async () => {
+                fileFilter.value = '';
+                await loadDirectory(item.getAttribute('data-path'), 1);
+            });
+        });
+
+        fileList.querySelectorAll('.file-item:not([data-bound])').forEach(item => {
+            item.setAttribute('data-bound', 'true');
             item.addEventListener('click', async () => {
                 const filePath = item.getAttribute('data-path');
                 await fetchFileContent(filePath);
@@ -74,6 +158,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 headers: {'Content-Type': 'application/json'},
                 body: JSON.stringify({
                     repo_url: currentRepo,
+                    sha: currentSha,
                     file_path: filePath
                 }),
             });
@@ -98,30 +183,119 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    let conversionController = null;
+
+    window.addEventListener('pagehide', () => {
+        if (conversionController) {
+            conversionController.abort();
+        }
+    });
+
     convertBtn.addEventListener('click', async () => {
+        if (conversionController) {
+            conversionController.abort();
+        }
+        const controller = new AbortController();
+        conversionController = controller;
+
         showLoading('Converting code...');
         convertedCode.value = '';
+        hideConversionError();
+        targetLanguageDisplay.textContent = `Language: ${targetLanguage.value}`;
 
         try {
-            const response = await fetch('/repo-convert/convert', {
+            const response = await fetch('/repo-convert/convert/stream', {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
                 body: JSON.stringify({
                     repo_url: currentRepo,
+                    sha: currentSha,
                     file_path: currentFile,
                     source_language: currentLanguage,
                     target_language: targetLanguage.value
                 }),
+                signal: controller.signal,
             });
 
-            const data = await response.json();
-            convertedCode.value = data.converted_code;
-            targetLanguageDisplay.textContent = `Language: ${targetLanguage.value}`;
+            if (!response.ok) {
+                showConversionError(await responseError(response));
+                return;
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let firstChunk = true;
+
+            while (true) {
+                const {value, done} = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, {stream: true});
+
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const message = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    const event = parseEvent(message);
+
+                    if (event.name === 'delta') {
+                        if (firstChunk) {
+                            hideLoading();
+                            firstChunk = false;
+                        }
+                        convertedCode.value += event.data.text;
+                    } else if (event.name === 'error') {
+                        showConversionError(`Conversion failed: ${event.data.detail || 'unknown error'}`);
+                    }
+                }
+            }
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                showConversionError(`Conversion failed: ${error.message}`);
+            }
         } finally {
-            hideLoading();
+            if (conversionController === controller) {
+                conversionController = null;
+                hideLoading();
+            }
         }
     });
 
+    function parseEvent(message) {
+        let name = 'message';
+        let data = '';
+        message.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                name = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                data += line.slice(5).trim();
+            }
+        });
+        return {name: name, data: data ? JSON.parse(data) : {}};
+    }
+
+    async function responseError(response) {
+        let detail;
+        try {
+            detail = (await response.json()).detail || response.statusText;
+        } catch (error) {
+            detail = response.statusText;
+        }
+        const retryAfter = response.headers.get('Retry-After');
+        const retry = retryAfter ? ` Try again in ${retryAfter}s.` : '';
+        return `Conversion failed (${response.status}): ${detail}.${retry}`;
+    }
+
+    function showConversionError(message) {
+        conversionError.textContent = message;
+        conversionError.classList.remove('hidden');
+    }
+
+    function hideConversionError() {
+        conversionError.textContent = '';
+        conversionError.classList.add('hidden');
+    }
+
     function showLoading(message) {
         loading.querySelector('p').textContent = message;
         loading.classList.remove('hidden');
@@ -0,0 +1,101 @@
+# built-in
+import hashlib
+import mimetypes
+import os
+import posixpath
+from dataclasses import dataclass, field
+
+# external
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+# internal
+from http_cache import (
+    choose_encoding,
+    compress,
+    etag_matches,
+    is_compressible,
+    supported_encodings,
+)
+
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@dataclass
+class Asset:
+    path: str
+    content: bytes
+    media_type: str
+    etag: str
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+
+class StaticAssets(StaticFiles):
+    def __init__(self, directory: str, minimum_size: int = 500):
+        super().__init__(directory=directory)
+        self.assets: dict[str, Asset] = {}
+        self.hashed_paths: dict[str, str] = {}
+        self.minimum_size: int = minimum_size
+        self.load(directory)
+
+    def load(self, directory: str) -> None:
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                full_path = os.path.join(root, filename)
+                path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    content = f.read()
+
+                digest = hashlib.blake2b(content, digest_size=6).hexdigest()
+                stem, extension = posixpath.splitext(path)
+                hashed_path = f"{stem}.{digest}{extension}"
+                media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+                asset = Asset(path, content, media_type, f'"{digest}"')
+                if is_compressible(media_type) and len(content) >= self.minimum_size:
+                    for encoding in supported_encodings():
+                        encoded = compress(content, encoding, best=True)
+                        if len(encoded) < len(content):
+                            asset.encoded[encoding] = encoded
+
+                self.assets[path] = asset
+                self.assets[hashed_path] = asset
+                self.hashed_paths[path] = hashed_path
+
+    def url(self, path: str) -> str:
+        return f"/static/{self.hashed_paths.get(path, path)}"
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset_path = path.replace(os.sep, "/")
+        asset = self.assets.get(asset_path)
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        request_headers = Headers(scope=scope)
+        headers: dict[str, str] = {
+            "ETag": asset.etag,
+            "Cache-Control": "no-cache" if asset_path == asset.path else IMMUTABLE_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(request_headers.get("if-none-match", ""), asset.etag):
+            return Response(status_code=304, headers=headers)
+
+        body = asset.content
+        encoding = choose_encoding(
+            request_headers.get("accept-encoding", ""), tuple(asset.encoded)
+        )
+        if encoding is not None:
+            body = asset.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type=asset.media_type, headers=headers)
+
+    def stats(self) -> dict[str, int]:
+        assets = [self.assets[path] for path in self.hashed_paths]
+        return {
+            "assets": len(assets),
+            "bytes": sum(len(asset.content) for asset in assets),
+            "precompressed": sum(1 for asset in assets if asset.encoded),
+        }
@@ -0,0 +1,63 @@
+# internal
+from chunking import split_source
+
+
+def java_method(index: int) -> str:
+    return (
+        f"    /** Returns value {index}. */\n"
+        f"    public int value{index}(int input) {{\n"
+        f"        int total = input;\n"
+        f"        for (int i = 0; i < {index}; i++) {{\n"
+        f"            total += i;\n"
+        f"        }}\n"
+        f"        return total;\n"
+        f"    }}\n"
+        f"\n"
+    )
+
+
+def python_method(index: int) -> str:
+    return (
+        f"    def value_{index}(self, value: int) -> int:\n"
+        f"        total = value\n"
+        f"        for i in range({index}):\n"
+        f"            total += i\n"
+        f"        return total\n"
+        f"\n"
+    )
+
+
+def test_java_class_is_split_at_method_boundaries():
+    methods = [java_method(index) for index in range(60)]
+    source = (
+        "package example;\n"
+        "\n"
+        "import java.util.List;\n"
+        "\n"
+        "public class Values {\n"
+        "    private int seed = 0;\n"
+        "\n" + "".join(methods) + "}\n"
+    )
+
+    context, chunks = split_source(source, "java", max_chunk_chars=800)
+
+    assert len(chunks) > 1
+    assert "public class Values {" in context
+    assert "public int value59(int input) {" in context
+    assert chunks[0].startswith("package example;")
+    assert chunks[-1].rstrip().endswith("}")
+    for method in methods:
+        assert any(method.strip() in chunk for chunk in chunks)
+
+
+def test_python_class_is_split_at_method_boundaries():
+    methods = [python_method(index) for index in range(60)]
+    source = "import math\n\n\nclass Values:\n" + "".join(methods)
+
+    context, chunks = split_source(source, "python", max_chunk_chars=600)
+
+    assert len(chunks) > 1
+    assert "class Values:" in context
+    assert "def value_59(self, value: int) -> int:" in context
+    for method in methods:
+        assert any(method.strip() in chunk for chunk in chunks)
@@ -0,0 +1,640 @@
+# built-in
+import asyncio
+import json
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+# external
+import numpy as np
+
+# internal
+from file_lock import file_lock, file_version
+from models import VectorMatch, VectorQueryResponse
+
+
+QUANTIZATION_DTYPES: dict[str, np.dtype] = {
+    "none": np.dtype(np.float32),
+    "float16": np.dtype(np.float16),
+    "int8": np.dtype(np.int8),
+}
+
+SCORE_BLOCK_BYTES = 4 * 1024 * 1024
+
+UNHASHABLE_CODE = -1
+UNKNOWN_CODE = -2
+
+STAR_COMPARISONS: dict[str, Any] = {
+    "$eq": np.equal,
+    "$ne": np.not_equal,
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+
+@dataclass
+class _Checkpoint:
+    changes: dict[str, tuple[list[str], np.ndarray, list[dict]]]
+    changed: dict[str, set[str]]
+    removed: dict[str, set[str]]
+    dirty: bool
+    disk_version: tuple[int, int] | None
+
+
+def quantize(
+    vectors: np.ndarray, dtype: np.dtype
+) -> tuple[np.ndarray, np.ndarray | None]:
+    if dtype != np.int8:
+        return vectors.astype(dtype), None
+
+    scales = np.abs(vectors).max(axis=-1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127)
+    return quantized.astype(np.int8), scales.astype(np.float32)
+
+
+def dequantize(matrix: np.ndarray, scales: np.ndarray | None = None) -> np.ndarray:
+    values = matrix.astype(np.float32)
+    if scales is not None:
+        values *= scales[:, None]
+    return values
+
+
+class _Namespace:
+    def __init__(
+        self, dimension: int, capacity: int = 1024, dtype: np.dtype = np.dtype(np.float32)
+    ):
+        self.dimension: int = dimension
+        self.dtype: np.dtype = dtype
+        self.matrix: np.ndarray = np.zeros((capacity, dimension), dtype=dtype)
+        self.scales: np.ndarray | None = (
+            np.ones(capacity, dtype=np.float32) if dtype == np.int8 else None
+        )
+        self.ids: list[str] = []
+        self.metadata: list[dict] = []
+        self.positions: dict[str, int] = {}
+        self.language_codes: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.languages: dict[Any, int] = {}
+        self.stars: np.ndarray = np.full(capacity, np.nan)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        matrix: np.ndarray,
+        scales: np.ndarray | None,
+        ids: list[str],
+        metadata: list[dict],
+        dtype: np.dtype,
+    ) -> "_Namespace":
+        store = cls(matrix.shape[1], capacity=max(len(ids), 1), dtype=dtype)
+        if matrix.dtype != dtype or (scales is None) != (store.scales is None):
+            store.upsert(ids, dequantize(matrix, scales), metadata)
+            return store
+        store.matrix[: len(ids)] = matrix
+        if scales is not None:
+            store.scales[: len(ids)] = scales
+        store.ids = list(ids)
+        store.metadata = list(metadata)
+        store.positions = {record_id: position for position, record_id in enumerate(ids)}
+        for position, record_metadata in enumerate(store.metadata):
+            store._set_columns(position, record_metadata)
+        return store
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def rows(self, ids: set[str]) -> tuple[list[str], np.ndarray, list[dict]]:
+        positions = [self.positions[i] for i in ids if i in self.positions]
+        return (
+            [self.ids[position] for position in positions],
+            dequantize(
+                self.matrix[positions],
+                self.scales[positions] if self.scales is not None else None,
+            ),
+            [self.metadata[position] for position in positions],
+        )
+
+    def _language_code(self, value: Any) -> int:
+        try:
+            return self.languages.setdefault(value, len(self.languages))
+        except TypeError:
+            return UNHASHABLE_CODE
+
+    def _set_columns(self, position: int, metadata: dict) -> None:
+        self.language_codes[position] = self._language_code(metadata.get("language"))
+        stars = metadata.get("stars")
+        self.stars[position] = stars if isinstance(stars, (int, float)) else np.nan
+
+    def set_metadata(self, position: int, metadata: dict) -> None:
+        self.metadata[position] = metadata
+        self._set_columns(position, metadata)
+
+    def _grow(self, required: int) -> None:
+        capacity = self.matrix.shape[0]
+        if required <= capacity:
+            return
+        while capacity < required:
+            capacity *= 2
+        grown = np.zeros((capacity, self.dimension), dtype=self.dtype)
+        grown[: self.size] = self.matrix[: self.size]
+        self.matrix = grown
+        if self.scales is not None:
+            scales = np.ones(capacity, dtype=np.float32)
+            scales[: self.size] = self.scales[: self.size]
+            self.scales = scales
+        language_codes = np.zeros(capacity, dtype=np.int32)
+        language_codes[: self.size] = self.language_codes[: self.size]
+        self.language_codes = language_codes
+        stars = np.full(capacity, np.nan)
+        stars[: self.size] = self.stars[: self.size]
+        self.stars = stars
+
+    def upsert(self, ids: list[str], vectors: np.ndarray, metadata: list[dict]) -> None:
+        self._grow(self.size + len(ids))
+        vectors, scales = quantize(vectors, self.dtype)
+        for index, (record_id, vector, record_metadata) in enumerate(
+            zip(ids, vectors, metadata)
+        ):
+            position = self.positions.get(record_id)
+            if position is None:
+                position = self.size
+                self.positions[record_id] = position
+                self.ids.append(record_id)
+                self.metadata.append(record_metadata)
+            else:
+                self.metadata[position] = record_metadata
+            self._set_columns(position, record_metadata)
+            self.matrix[position] = vector
+            if scales is not None:
+                self.scales[position] = scales[index]
+
+    def scores(self, query_vector: np.ndarray) -> np.ndarray:
+        if self.dtype == np.float32:
+            return self.matrix[: self.size] @ query_vector
+
+        scores = np.empty(self.size, dtype=np.float32)
+        block_rows = max(1, SCORE_BLOCK_BYTES // (self.dimension * 4))
+        block = np.empty((min(block_rows, self.size), self.dimension), dtype=np.float32)
+        for start in range(0, self.size, block_rows):
+            end = min(start + block_rows, self.size)
+            rows = block[: end - start]
+            np.copyto(rows, self.matrix[start:end], casting="unsafe")
+            np.matmul(rows, query_vector, out=scores[start:end])
+        if self.scales is not None:
+            scores *= self.scales[: self.size]
+        return scores
+
+    def delete(self, ids: list[str]) -> None:
+        for record_id in ids:
+            position = self.positions.pop(record_id, None)
+            if position is None:
+                continue
+            last = self.size - 1
+            if position != last:
+                moved_id = self.ids[last]
+                self.matrix[position] = self.matrix[last]
+                if self.scales is not None:
+                    self.scales[position] = self.scales[last]
+                self.ids[position] = moved_id
+                self.metadata[position] = self.metadata[last]
+                self.language_codes[position] = self.language_codes[last]
+                self.stars[position] = self.stars[last]
+                self.positions[moved_id] = position
+            self.ids.pop()
+            self.metadata.pop()
+            self.matrix[last] = 0.0
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition
+
+    for operator, operand in condition.items():
+        if operator == "$eq" and not value == operand:
+            return False
+        if operator == "$ne" and not value != operand:
+            return False
+        if operator == "$in" and value not in operand:
+            return False
+        if operator == "$nin" and value in operand:
+            return False
+        if operator in ("$gt", "$gte", "$lt", "$lte"):
+            if value is None:
+                return False
+            if operator == "$gt" and not value > operand:
+                return False
+            if operator == "$gte" and not value >= operand:
+                return False
+            if operator == "$lt" and not value < operand:
+                return False
+            if operator == "$lte" and not value <= operand:
+                return False
+    return True
+
+
+def _language_mask(store: _Namespace, condition: Any) -> np.ndarray | None:
+    codes = store.language_codes[: store.size]
+    mask = np.ones(store.size, dtype=bool)
+    for operator, operand in (
+        condition.items() if isinstance(condition, dict) else [("$eq", condition)]
+    ):
+        try:
+            if operator in ("$eq", "$ne"):
+                matched = codes == store.languages.get(operand, UNKNOWN_CODE)
+            elif operator in ("$in", "$nin"):
+                if not isinstance(operand, (list, tuple, set)):
+                    return None
+                known = [store.languages[value] for value in operand if value in store.languages]
+                matched = np.isin(codes, known)
+            elif operator in STAR_COMPARISONS:
+                return None
+            else:
+                continue
+        except TypeError:
+            return None
+        mask &= matched if operator in ("$eq", "$in") else ~matched
+    return mask
+
+
+def _stars_mask(store: _Namespace, condition: Any) -> np.ndarray | None:
+    stars = store.stars[: store.size]
+    mask = np.ones(store.size, dtype=bool)
+    for operator, operand in (
+        condition.items() if isinstance(condition, dict) else [("$eq", condition)]
+    ):
+        if operator in ("$in", "$nin"):
+            if not isinstance(operand, (list, tuple, set)) or not all(
+                isinstance(value, (int, float)) for value in operand
+            ):
+                return None
+            matched = np.isin(stars, list(operand))
+            mask &= matched if operator == "$in" else ~matched
+        elif operator in STAR_COMPARISONS:
+            if not isinstance(operand, (int, float)):
+                return None
+            mask &= STAR_COMPARISONS[operator](stars, operand)
+    return mask
+
+
+def column_mask(store: _Namespace, metadata_filter: dict) -> np.ndarray | None:
+    mask = np.ones(store.size, dtype=bool)
+    for key, condition in metadata_filter.items():
+        if key in ("$and", "$or"):
+            clauses = [column_mask(store, clause) for clause in condition]
+            if any(clause is None for clause in clauses):
+                return None
+            combine = np.logical_and if key == "$and" else np.logical_or
+            clause_mask = combine.reduce(
+                [np.full(store.size, key == "$and", dtype=bool)] + clauses
+            )
+        elif key == "language":
+            clause_mask = _language_mask(store, condition)
+        elif key == "stars":
+            clause_mask = _stars_mask(store, condition)
+        else:
+            return None
+        if clause_mask is None:
+            return None
+        mask &= clause_mask
+    return mask
+
+
+def matches_filter(metadata: dict, metadata_filter: dict | None) -> bool:
+    if not metadata_filter:
+        return True
+
+    for key, condition in metadata_filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif not _match_condition(metadata.get(key), condition):
+            return False
+    return True
+
+
+class LocalVectorIndex:
+    def __init__(self, path: str | None = None, quantization: str = "none"):
+        if quantization not in QUANTIZATION_DTYPES:
+            raise ValueError(f"Unknown vector quantization: {quantization}")
+        self.path: str | None = path
+        self.dtype: np.dtype = QUANTIZATION_DTYPES[quantization]
+        self.namespaces: dict[str, _Namespace] = {}
+        self.dirty: bool = False
+        self.changed: dict[str, set[str]] = {}
+        self.removed: dict[str, set[str]] = {}
+        self.disk_version: tuple[int, int] | None = None
+        if path:
+            self.load()
+
+    async def upsert(self, vectors: list[dict], namespace: str = "") -> dict:
+        if not vectors:
+            return {"upserted_count": 0}
+
+        values = np.asarray([record["values"] for record in vectors], dtype=np.float32)
+        if values.ndim != 2:
+            raise ValueError("Vectors must share a single dimension")
+
+        store = self.namespaces.get(namespace)
+        if store is None:
+            store = _Namespace(values.shape[1], dtype=self.dtype)
+            self.namespaces[namespace] = store
+        elif store.dimension != values.shape[1]:
+            raise ValueError(
+                f"Vector dimension {values.shape[1]} does not match index dimension {store.dimension}"
+            )
+
+        ids = [str(record["id"]) for record in vectors]
+        store.upsert(
+            ids,
+            _normalize(values),
+            [dict(record.get("metadata") or {}) for record in vectors],
+        )
+        self._mark_changed(namespace, ids)
+        return {"upserted_count": len(vectors)}
+
+    async def query(
+        self,
+        vector: list[float],
+        top_k: int = 10,
+        namespace: str = "",
+        include_metadata: bool = False,
+        filter: dict | None = None,
+        **kwargs,
+    ) -> VectorQueryResponse:
+        store = self.namespaces.get(namespace)
+        if store is None or store.size == 0 or top_k <= 0:
+            return VectorQueryResponse(matches=[], namespace=namespace)
+
+        query_vector = _normalize(np.asarray(vector, dtype=np.float32))
+        if query_vector.shape[0] != store.dimension:
+            raise ValueError(
+                f"Query dimension {query_vector.shape[0]} does not match index dimension {store.dimension}"
+            )
+
+        scores = store.scores(query_vector)
+        if filter:
+            mask = column_mask(store, filter)
+            if mask is None:
+                mask = np.fromiter(
+                    (matches_filter(metadata, filter) for metadata in store.metadata),
+                    dtype=bool,
+                    count=store.size,
+                )
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(top_k, store.size)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ranked = candidates[np.argsort(-scores[candidates])]
+
+        matches: list[VectorMatch] = []
+        for position in ranked:
+            score = float(scores[position])
+            if score == -np.inf:
+                break
+            matches.append(
+                VectorMatch(
+                    id=store.ids[position],
+                    score=score,
+                    metadata=store.metadata[position] if include_metadata else None,
+                )
+            )
+        return VectorQueryResponse(matches=matches, namespace=namespace)
+
+    async def update(
+        self,
+        id: str,
+        values: list[float] | None = None,
+        set_metadata: dict | None = None,
+        namespace: str = "",
+        **kwargs,
+    ) -> dict:
+        store = self.namespaces.get(namespace)
+        position = store.positions.get(str(id)) if store is not None else None
+        if position is None:
+            return {}
+
+        metadata = {**store.metadata[position], **(set_metadata or {})}
+        if values is not None:
+            vector = _normalize(np.asarray([values], dtype=np.float32))
+            store.upsert([str(id)], vector, [metadata])
+        else:
+            store.set_metadata(position, metadata)
+        self._mark_changed(namespace, [str(id)])
+        return {}
+
+    async def delete(self, ids: list[str], namespace: str = "") -> dict:
+        store = self.namespaces.get(namespace)
+        if store is not None:
+            removed = [str(record_id) for record_id in ids]
+            store.delete(removed)
+            self.changed.get(namespace, set()).difference_update(removed)
+            self.removed.setdefault(namespace, set()).update(removed)
+            self.dirty = True
+        return {}
+
+    def _mark_changed(self, namespace: str, ids: list[str]) -> None:
+        self.changed.setdefault(namespace, set()).update(ids)
+        self.removed.get(namespace, set()).difference_update(ids)
+        self.dirty = True
+
+    async def describe_index_stats(self) -> dict:
+        return {
+            "namespaces": {
+                name: {"vector_count": store.size}
+                for name, store in self.namespaces.items()
+            },
+            "dimension": next(
+                (store.dimension for store in self.namespaces.values()), 0
+            ),
+            "vector_bytes": sum(
+                store.matrix[: store.size].nbytes
+                + (store.scales[: store.size].nbytes if store.scales is not None else 0)
+                for store in self.namespaces.values()
+            ),
+            "total_vector_count": sum(
+                store.size for store in self.namespaces.values()
+            ),
+        }
+
+    def _read(self) -> dict[str, _Namespace]:
+        manifest_path = os.path.join(self.path, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return {}
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest: dict = json.load(f)
+
+        namespaces: dict[str, _Namespace] = {}
+        for name, entry in manifest.get("namespaces", {}).items():
+            matrix = np.load(os.path.join(self.path, entry["file"]))
+            scales = (
+                np.load(os.path.join(self.path, entry["scales"]))
+                if entry.get("scales")
+                else None
+            )
+            namespaces[name] = _Namespace.from_arrays(
+                matrix, scales, entry["ids"], entry["metadata"], self.dtype
+            )
+        return namespaces
+
+    def load(self) -> None:
+        with file_lock(os.path.join(self.path, ".lock")):
+            self.namespaces = self._read()
+            self.disk_version = file_version(os.path.join(self.path, "manifest.json"))
+
+    def _changes(
+        self, changed: dict[str, set[str]]
+    ) -> dict[str, tuple[list[str], np.ndarray, list[dict]]]:
+        return {
+            name: self.namespaces[name].rows(ids)
+            for name, ids in changed.items()
+            if ids and name in self.namespaces
+        }
+
+    def _apply(
+        self,
+        namespaces: dict[str, _Namespace],
+        removed: dict[str, set[str]],
+        changes: dict[str, tuple[list[str], np.ndarray, list[dict]]],
+    ) -> None:
+        for name, ids in removed.items():
+            store = namespaces.get(name)
+            if store is not None:
+                store.delete(list(ids))
+
+        for name, (ids, vectors, metadata) in changes.items():
+            if not ids:
+                continue
+            target = namespaces.get(name)
+            if target is None or target.dimension != vectors.shape[1]:
+                target = namespaces[name] = _Namespace(vectors.shape[1], dtype=self.dtype)
+            target.upsert(ids, vectors, metadata)
+
+    def _take_checkpoint(self) -> _Checkpoint | None:
+        manifest_path = os.path.join(self.path, "manifest.json")
+        if not self.dirty and file_version(manifest_path) in (None, self.disk_version):
+            return None
+        checkpoint = _Checkpoint(
+            self._changes(self.changed),
+            self.changed,
+            self.removed,
+            self.dirty,
+            self.disk_version,
+        )
+        self.changed, self.removed, self.dirty = {}, {}, False
+        return checkpoint
+
+    def _restore(self, checkpoint: _Checkpoint) -> None:
+        for name, ids in checkpoint.changed.items():
+            self.changed.setdefault(name, set()).update(
+                ids - self.removed.get(name, set())
+            )
+        for name, ids in checkpoint.removed.items():
+            self.removed.setdefault(name, set()).update(
+                ids - self.changed.get(name, set())
+            )
+        self.dirty = self.dirty or checkpoint.dirty
+
+    def _save(
+        self, checkpoint: _Checkpoint
+    ) -> tuple[dict[str, _Namespace] | None, tuple[int, int] | None]:
+        manifest_path = os.path.join(self.path, "manifest.json")
+        with file_lock(os.path.join(self.path, ".lock")):
+            outside_write = file_version(manifest_path) not in (
+                None,
+                checkpoint.disk_version,
+            )
+            namespaces = self._read()
+            self._apply(namespaces, checkpoint.removed, checkpoint.changes)
+            if checkpoint.dirty:
+                self._write(namespaces)
+            return namespaces if outside_write else None, file_version(manifest_path)
+
+    def _adopt(
+        self,
+        result: tuple[dict[str, _Namespace] | None, tuple[int, int] | None],
+    ) -> None:
+        namespaces, disk_version = result
+        if namespaces is not None:
+            self._apply(namespaces, self.removed, self._changes(self.changed))
+            self.namespaces = namespaces
+        self.disk_version = disk_version
+
+    def persist(self) -> None:
+        checkpoint = self._take_checkpoint() if self.path else None
+        if checkpoint is None:
+            return
+        try:
+            result = self._save(checkpoint)
+        except BaseException:
+            self._restore(checkpoint)
+            raise
+        self._adopt(result)
+
+    async def checkpoint(self) -> None:
+        checkpoint = self._take_checkpoint() if self.path else None
+        if checkpoint is None:
+            return
+        try:
+            result = await asyncio.to_thread(self._save, checkpoint)
+        except BaseException:
+            self._restore(checkpoint)
+            raise
+        self._adopt(result)
+
+    def _write(self, namespaces: dict[str, _Namespace]) -> None:
+        manifest: dict = {"namespaces": {}}
+        version = uuid.uuid4().hex[:12]
+        for index, (name, store) in enumerate(namespaces.items()):
+            file_name = f"namespace_{index}_{version}.npy"
+            with tempfile.NamedTemporaryFile(
+                dir=self.path, suffix=".npy", delete=False
+            ) as f:
+                np.save(f, store.matrix[: store.size])
+            os.replace(f.name, os.path.join(self.path, file_name))
+            manifest["namespaces"][name] = {
+                "file": file_name,
+                "ids": store.ids,
+                "metadata": store.metadata,
+            }
+
+            if store.scales is not None:
+                scales_name = f"namespace_{index}_{version}_scales.npy"
+                with tempfile.NamedTemporaryFile(
+                    dir=self.path, suffix=".npy", delete=False
+                ) as f:
+                    np.save(f, store.scales[: store.size])
+                os.replace(f.name, os.path.join(self.path, scales_name))
+                manifest["namespaces"][name]["scales"] = scales_name
+
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.path, suffix=".json", delete=False, encoding="utf-8"
+        ) as f:
+            json.dump(manifest, f)
+        os.replace(f.name, os.path.join(self.path, "manifest.json"))
+
+        referenced = {
+            entry.get(field)
+            for entry in manifest["namespaces"].values()
+            for field in ("file", "scales")
+        }
+        for file_name in os.listdir(self.path):
+            if file_name.endswith(".npy") and file_name not in referenced:
+                os.remove(os.path.join(self.path, file_name))
+
+    async def close(self) -> None:
+        self.persist()